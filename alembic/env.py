@@ -53,7 +53,8 @@ async def run_migrations_online() -> None:
         url=get_url(),
         pool_pre_ping=True,
     )
-    async with engine.begin() as connection:
+    # Alembic manages the transaction itself, so migrations can use autocommit_block()
+    async with engine.connect() as connection:
         await connection.run_sync(
             fn=run_sync_migrations,
         )
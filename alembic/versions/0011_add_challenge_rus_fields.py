@@ -0,0 +1,18 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("challenges", sa.Column("title_rus", sa.String(length=200), nullable=True))
+    op.add_column("challenges", sa.Column("short_description_rus", sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("challenges", "short_description_rus")
+    op.drop_column("challenges", "title_rus")
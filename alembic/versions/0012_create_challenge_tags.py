@@ -0,0 +1,42 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "challenge_tags",
+        sa.Column("challenge_id", sa.BigInteger(), sa.ForeignKey("challenges.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tag_id", sa.BigInteger(), sa.ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_challenge_tags_tag_id_challenge_id", "challenge_tags", ["tag_id", "challenge_id"], unique=False)
+    op.execute(
+        """
+        INSERT INTO tags (name)
+        SELECT DISTINCT btrim(t.name)
+        FROM challenges c
+        CROSS JOIN LATERAL unnest(string_to_array(c.tags, ',')) AS t(name)
+        WHERE btrim(t.name) <> ''
+        ON CONFLICT (name) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO challenge_tags (challenge_id, tag_id)
+        SELECT DISTINCT c.id, tg.id
+        FROM challenges c
+        CROSS JOIN LATERAL unnest(string_to_array(c.tags, ',')) AS t(name)
+        JOIN tags tg ON tg.name = btrim(t.name)
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_challenge_tags_tag_id_challenge_id", table_name="challenge_tags")
+    op.drop_table("challenge_tags")
@@ -0,0 +1,34 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the earliest row of every duplicated view/select
+    op.execute(
+        """
+        DELETE FROM user_activities a
+        USING user_activities b
+        WHERE a.activity_type IN ('view', 'select')
+          AND b.activity_type = a.activity_type
+          AND b.user_id = a.user_id
+          AND b.challenge_id = a.challenge_id
+          AND b.id < a.id
+        """
+    )
+    op.create_index(
+        "uq_user_activities_once",
+        "user_activities",
+        ["user_id", "challenge_id", "activity_type"],
+        unique=True,
+        postgresql_where=sa.text("activity_type IN ('view', 'select')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_user_activities_once", table_name="user_activities")
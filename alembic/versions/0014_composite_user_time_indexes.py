@@ -0,0 +1,61 @@
+from alembic import op
+
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+# (table, new composite index, columns, covered columns, single-column index it replaces)
+_INDEXES = (
+    (
+        "user_activities",
+        "ix_user_activities_user_type_created",
+        ["user_id", "activity_type", "created_at"],
+        ["challenge_id"],
+        "ix_user_activities_user_id",
+    ),
+    ("challenge_completions", "ix_challenge_completions_user_created", ["user_id", "created_at"], [], "ix_challenge_completions_user_id"),
+    ("replacements", "ix_replacements_user_created", ["user_id", "created_at"], [], "ix_replacements_user_id"),
+    ("auth_codes", "ix_auth_codes_user_created", ["user_id", "created_at"], [], "ix_auth_codes_user_id"),
+)
+
+
+def upgrade() -> None:
+    # Built concurrently so that writes to these tables are not blocked
+    with op.get_context().autocommit_block():
+        for table, name, columns, include, replaced in _INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            # The composite index has the same leading column
+            op.drop_index(replaced, table_name=table, postgresql_concurrently=True, if_exists=True)
+        # Every query filtering on activity_type also filters on user_id
+        op.drop_index(
+            "ix_user_activities_activity_type",
+            table_name="user_activities",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_activities_activity_type",
+            "user_activities",
+            ["activity_type"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for table, name, _, _, replaced in _INDEXES:
+            op.create_index(replaced, table, ["user_id"], unique=False, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
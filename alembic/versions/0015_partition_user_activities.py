@@ -0,0 +1,133 @@
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+
+# Partitions created past the current month; `app.tasks.maintain_activity_partitions` keeps this up
+_MONTHS_AHEAD = 3
+
+
+def _add_months(
+    month: date,
+    months: int,
+) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(
+    month: date,
+) -> None:
+    name = f"user_activities_y{month.year}m{month.month:02d}"
+    op.execute(
+        f"CREATE TABLE {name} PARTITION OF user_activities "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+    op.execute(
+        f"CREATE UNIQUE INDEX {name}_once ON {name} (user_id, challenge_id, activity_type) "
+        "WHERE activity_type IN ('view', 'select')"
+    )
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE user_activities RENAME TO user_activities_old")
+    op.execute("ALTER TABLE user_activities_old RENAME CONSTRAINT user_activities_pkey TO user_activities_old_pkey")
+    for index in ("ix_user_activities_challenge_id", "ix_user_activities_user_type_created", "uq_user_activities_once"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute(
+        """
+        CREATE TABLE user_activities (
+            id bigint NOT NULL DEFAULT nextval('user_activities_id_seq'),
+            user_id bigint NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            activity_type varchar(50) NOT NULL,
+            challenge_id bigint NOT NULL REFERENCES challenges (id) ON DELETE CASCADE,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE user_activities_id_seq OWNED BY user_activities.id")
+    op.create_index(
+        "ix_user_activities_user_type_created",
+        "user_activities",
+        ["user_id", "activity_type", "created_at"],
+        unique=False,
+        postgresql_include=["challenge_id"],
+    )
+    op.create_index("ix_user_activities_challenge_id", "user_activities", ["challenge_id"], unique=False)
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM user_activities_old")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = min(oldest.astimezone(timezone.utc).date().replace(day=1), current) if oldest else current
+    while month <= _add_months(current, _MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+
+    op.execute(
+        """
+        INSERT INTO user_activities (id, user_id, activity_type, challenge_id, created_at)
+        SELECT id, user_id, activity_type, challenge_id, created_at
+        FROM user_activities_old
+        """
+    )
+    op.execute("DROP TABLE user_activities_old")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE user_activities RENAME TO user_activities_partitioned")
+    op.execute(
+        "ALTER TABLE user_activities_partitioned RENAME CONSTRAINT user_activities_pkey TO user_activities_partitioned_pkey"
+    )
+    op.execute(
+        """
+        CREATE TABLE user_activities (
+            id bigint NOT NULL DEFAULT nextval('user_activities_id_seq') PRIMARY KEY,
+            user_id bigint NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            activity_type varchar(50) NOT NULL,
+            challenge_id bigint NOT NULL REFERENCES challenges (id) ON DELETE CASCADE,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE user_activities_id_seq OWNED BY user_activities.id")
+    # Duplicates across months are possible while partitioned; keep the earliest row
+    op.execute(
+        """
+        INSERT INTO user_activities (id, user_id, activity_type, challenge_id, created_at)
+        SELECT id, user_id, activity_type, challenge_id, created_at
+        FROM user_activities_partitioned p
+        WHERE p.activity_type NOT IN ('view', 'select')
+           OR NOT EXISTS (
+                SELECT 1 FROM user_activities_partitioned q
+                WHERE q.user_id = p.user_id
+                  AND q.challenge_id = p.challenge_id
+                  AND q.activity_type = p.activity_type
+                  AND q.id < p.id
+           )
+        """
+    )
+    op.execute("DROP TABLE user_activities_partitioned")
+    op.create_index(
+        "ix_user_activities_user_type_created",
+        "user_activities",
+        ["user_id", "activity_type", "created_at"],
+        unique=False,
+        postgresql_include=["challenge_id"],
+    )
+    op.create_index("ix_user_activities_challenge_id", "user_activities", ["challenge_id"], unique=False)
+    op.create_index(
+        "uq_user_activities_once",
+        "user_activities",
+        ["user_id", "challenge_id", "activity_type"],
+        unique=True,
+        postgresql_where=sa.text("activity_type IN ('view', 'select')"),
+    )
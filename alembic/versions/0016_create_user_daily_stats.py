@@ -0,0 +1,49 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016"
+down_revision = "0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_daily_stats",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("completions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("replacements", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("swipes_left", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("swipes_right", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("views", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("selects", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Same aggregation as `app.tasks.backfill_daily_stats`, over all history
+    op.execute(
+        """
+        INSERT INTO user_daily_stats (user_id, day, completions, replacements, swipes_left, swipes_right, views, selects)
+        SELECT user_id, day, sum(completions), sum(replacements), sum(swipes_left), sum(swipes_right), sum(views), sum(selects)
+        FROM (
+            SELECT user_id, (created_at AT TIME ZONE 'UTC')::date AS day,
+                   count(*) AS completions, 0 AS replacements, 0 AS swipes_left, 0 AS swipes_right, 0 AS views, 0 AS selects
+            FROM challenge_completions GROUP BY 1, 2
+            UNION ALL
+            SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, 0, count(*), 0, 0, 0, 0
+            FROM replacements GROUP BY 1, 2
+            UNION ALL
+            SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, 0, 0,
+                   count(*) FILTER (WHERE activity_type = 'swipe_left'),
+                   count(*) FILTER (WHERE activity_type = 'swipe_right'),
+                   count(*) FILTER (WHERE activity_type = 'view'),
+                   count(*) FILTER (WHERE activity_type = 'select')
+            FROM user_activities GROUP BY 1, 2
+        ) AS counts
+        GROUP BY user_id, day
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_daily_stats")
@@ -0,0 +1,52 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0017"
+down_revision = "0016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("current_streak", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("longest_streak", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("last_completion_day", sa.Date(), nullable=True))
+    op.add_column("users", sa.Column("total_completed", sa.Integer(), nullable=False, server_default="0"))
+    # Same computation as `UserRepository.recompute_progress`
+    op.execute(
+        """
+        WITH days AS (
+            SELECT user_id, day, completions,
+                   day - CAST(row_number() OVER (PARTITION BY user_id ORDER BY day) AS int) AS run
+            FROM user_daily_stats
+            WHERE completions > 0
+        ),
+        runs AS (
+            SELECT user_id, count(*) AS length, max(day) AS last_day, sum(completions) AS completions
+            FROM days GROUP BY user_id, run
+        ),
+        progress AS (
+            SELECT user_id,
+                   (array_agg(length ORDER BY last_day DESC))[1] AS current_streak,
+                   max(length) AS longest_streak,
+                   max(last_day) AS last_completion_day,
+                   sum(completions) AS total_completed
+            FROM runs GROUP BY user_id
+        )
+        UPDATE users u
+        SET current_streak = p.current_streak,
+            longest_streak = p.longest_streak,
+            last_completion_day = p.last_completion_day,
+            total_completed = p.total_completed
+        FROM progress p
+        WHERE u.id = p.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "total_completed")
+    op.drop_column("users", "last_completion_day")
+    op.drop_column("users", "longest_streak")
+    op.drop_column("users", "current_streak")
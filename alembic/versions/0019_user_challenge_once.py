@@ -0,0 +1,82 @@
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0019"
+down_revision = "0018"
+branch_labels = None
+depends_on = None
+
+
+def _add_months(
+    month: date,
+    months: int,
+) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partitions() -> list[str]:
+    res = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST('user_activities' AS regclass)
+            """
+        )
+    )
+    return [name for (name,) in res.all()]
+
+
+def upgrade() -> None:
+    # Unique indexes of a partitioned table must include the partition key,
+    # so the once-per-user rule for views and selections lives here instead
+    op.create_table(
+        "user_challenge_once",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("challenge_id", sa.BigInteger(), sa.ForeignKey("challenges.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("activity_type", sa.String(length=50), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("user_id", "challenge_id", "activity_type"),
+    )
+    op.execute(
+        """
+        INSERT INTO user_challenge_once (user_id, challenge_id, activity_type, created_at)
+        SELECT user_id, challenge_id, activity_type, min(created_at)
+        FROM user_activities
+        WHERE activity_type IN ('view', 'select')
+        GROUP BY user_id, challenge_id, activity_type
+        """
+    )
+    for name in _partitions():
+        op.execute(f"DROP INDEX IF EXISTS {name}_once")
+    # Catches rows outside the monthly partitions until maintenance moves them
+    op.execute("CREATE TABLE user_activities_default PARTITION OF user_activities DEFAULT")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE user_activities DETACH PARTITION user_activities_default")
+    # Give the rows that were caught by the default partition a monthly one
+    months = op.get_bind().execute(
+        sa.text(
+            "SELECT DISTINCT CAST(date_trunc('month', created_at AT TIME ZONE 'UTC') AS date) FROM user_activities_default"
+        )
+    )
+    for (month,) in months.all():
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE user_activities_y{month.year}m{month.month:02d} PARTITION OF user_activities "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+        )
+    op.execute("INSERT INTO user_activities SELECT * FROM user_activities_default")
+    op.execute("DROP TABLE user_activities_default")
+    for name in _partitions():
+        op.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_once ON {name} (user_id, challenge_id, activity_type) "
+            "WHERE activity_type IN ('view', 'select')"
+        )
+    op.drop_table("user_challenge_once")
@@ -0,0 +1,10 @@
+from fastapi import Request
+
+from app.services.activity_buffer import ActivityWriteBuffer
+
+
+def get_activity_buffer(
+    request: Request,
+) -> ActivityWriteBuffer | None:
+    """Return the app's write-behind buffer, or None when events are written inline."""
+    return getattr(request.app.state, "activity_buffer", None)
@@ -1,27 +1,120 @@
 from typing import Annotated
 
 import jwt
-from datetime import datetime, timezone
-from fastapi import Depends, HTTPException, Header, status
+from fastapi import Depends, HTTPException, Header, Request, status
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps.redis import get_redis
 from app.core.settings import get_settings
-from app.core.security import is_token_blacklisted
+from app.core.security import Principal, is_token_revoked, token_id
+from app.db.session import get_db_session
+from app.models.user import User
+from app.repositories.user_cache import get_user_cache
+from app.repositories.user_repo import UserRepository
+from app.services.token_revocation import TokenRevocationCache
 
 
-def get_current_user_id(
+def get_revocation_cache(
+    request: Request,
+) -> TokenRevocationCache | None:
+    """Return the process-local revocation cache, or None when the app runs without one."""
+    return getattr(request.app.state, "revocations", None)
+
+
+async def get_principal(
+    request: Request,
     authorization: Annotated[str | None, Header(alias="Authorization")] = None,
-) -> int:
+    redis: Redis = Depends(get_redis),
+    revocations: TokenRevocationCache | None = Depends(get_revocation_cache),
+    session: AsyncSession = Depends(get_db_session),
+) -> Principal:
+    """Authenticate the request once and keep the result on `request.state.principal`."""
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     token = authorization.split(" ", 1)[1]
     settings = get_settings()
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        if is_token_blacklisted(jti=str(payload.get("iat"))):
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-        sub = payload.get("sub")
-        return int(sub)
+        principal = Principal(
+            user_id=int(payload.get("sub")),
+            jti=token_id(payload),
+            # Tokens issued before epochs existed count as epoch 0
+            token_epoch=int(payload.get("token_epoch", 0)),
+            claims=payload,
+        )
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    user_id = principal.user_id
+    # The local copy answers without I/O; Redis and the database only while it is not in sync
+    if revocations is not None and revocations.ready:
+        revoked = revocations.is_revoked(jti=principal.jti)
+        current_epoch = revocations.token_epoch(user_id)
+    else:
+        revoked = await is_token_revoked(jti=principal.jti, redis=redis)
+        current_epoch = None
+    if revoked:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if current_epoch is None:
+        current_epoch = await UserRepository(session=session).get_token_epoch(user_id)
+        if current_epoch is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        if revocations is not None:
+            revocations.set_token_epoch(user_id, current_epoch)
+    if principal.token_epoch < current_epoch:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    request.state.principal = principal
+    return principal
+
+
+async def get_optional_principal(
+    request: Request,
+    authorization: Annotated[str | None, Header(alias="Authorization")] = None,
+    redis: Redis = Depends(get_redis),
+    revocations: TokenRevocationCache | None = Depends(get_revocation_cache),
+    session: AsyncSession = Depends(get_db_session),
+) -> Principal | None:
+    """Like `get_principal`, but anonymous requests and bad or expired tokens resolve to None.
+
+    Routes that need the caller for part of their behaviour reject None themselves.
+    """
+    if authorization is None:
+        return None
+    try:
+        return await get_principal(
+            request=request,
+            authorization=authorization,
+            redis=redis,
+            revocations=revocations,
+            session=session,
+        )
+    except HTTPException:
+        return None
 
 
+async def get_current_user_id(
+    principal: Principal = Depends(get_principal),
+) -> int:
+    return principal.user_id
+
+
+async def get_optional_user_id(
+    principal: Principal | None = Depends(get_optional_principal),
+) -> int | None:
+    return principal.user_id if principal is not None else None
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_principal),
+    session: AsyncSession = Depends(get_db_session),
+) -> User:
+    """Return the caller's `users` row: a read-only snapshot at most `user_cache_ttl_seconds` old."""
+    if principal.user is None:
+        user = await get_user_cache().get(session=session, user_id=principal.user_id)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        principal.user = user
+    return principal.user
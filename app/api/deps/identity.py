@@ -0,0 +1,11 @@
+from fastapi import Request
+
+from app.integrations.jwks import IdentityProviders, get_identity_providers
+
+
+async def get_identity(
+    request: Request,
+) -> IdentityProviders:
+    """Return the app's ID-token verifiers (cached provider keys, one HTTP pool)."""
+    providers = getattr(request.app.state, "identity", None)
+    return providers if providers is not None else get_identity_providers()
@@ -0,0 +1,12 @@
+from fastapi import Request
+from redis.asyncio import Redis
+
+from app.core.redis import get_async_redis
+
+
+async def get_redis(
+    request: Request,
+) -> Redis:
+    """Return the app's shared Redis client (one pool per process, opened by the lifespan)."""
+    client = getattr(request.app.state, "redis", None)
+    return client if client is not None else get_async_redis()
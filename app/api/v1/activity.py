@@ -1,8 +1,14 @@
+from typing import Literal
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
+from app.api.deps.activity import get_activity_buffer
 from app.api.deps.auth import get_current_user_id
 from app.db.session import get_db_session
+from app.repositories.user_daily_stats_repo import utc_today
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.services.challenge_service import ChallengeService
 from app.services.user_activity_service import UserActivityService
 
 router = APIRouter(prefix="/activity", tags=["activity"])
@@ -25,11 +31,41 @@ class FavoriteRequest(BaseModel):
     challenge_id: int
 
 
+class ActivityEvent(BaseModel):
+    type: Literal["swipe", "view", "select"]
+    challenge_id: int
+    direction: Literal["left", "right"] | None = None  # swipes only
+
+    @model_validator(mode="after")
+    def check_direction(self) -> "ActivityEvent":
+        if self.type == "swipe" and self.direction is None:
+            raise ValueError("Swipe events need a direction")
+        return self
+
+    @property
+    def activity_type(self) -> str:
+        return f"swipe_{self.direction}" if self.type == "swipe" else self.type
+
+
+class ActivityBatchRequest(BaseModel):
+    events: list[ActivityEvent] = Field(min_length=1, max_length=500)
+
+
+async def _require_challenge(
+    session,
+    challenge_id: int,
+) -> None:
+    """404 for unknown challenges, checked against the cached catalog before anything is queued."""
+    if await ChallengeService(session=session).get(challenge_id=challenge_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
+
+
 @router.post("/swipe")
 async def track_swipe(
     request: SwipeRequest,
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
+    buffer: ActivityWriteBuffer | None = Depends(get_activity_buffer),
 ):
     """Track a swipe action"""
     if request.direction not in ["left", "right"]:
@@ -38,7 +74,8 @@ async def track_swipe(
             detail="Direction must be 'left' or 'right'"
         )
     
-    service = UserActivityService(session=session)
+    await _require_challenge(session, request.challenge_id)
+    service = UserActivityService(session=session, buffer=buffer)
     await service.track_swipe(user_id, request.challenge_id, request.direction)
     return {"message": "Swipe tracked successfully"}
 
@@ -48,9 +85,11 @@ async def track_view(
     request: ViewRequest,
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
+    buffer: ActivityWriteBuffer | None = Depends(get_activity_buffer),
 ):
     """Track when user views a challenge"""
-    service = UserActivityService(session=session)
+    await _require_challenge(session, request.challenge_id)
+    service = UserActivityService(session=session, buffer=buffer)
     await service.track_view(user_id, request.challenge_id)
     return {"message": "View tracked successfully"}
 
@@ -60,13 +99,32 @@ async def track_selection(
     request: SelectionRequest,
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
+    buffer: ActivityWriteBuffer | None = Depends(get_activity_buffer),
 ):
     """Track when user selects a challenge"""
-    service = UserActivityService(session=session)
+    await _require_challenge(session, request.challenge_id)
+    service = UserActivityService(session=session, buffer=buffer)
     await service.track_selection(user_id, request.challenge_id)
     return {"message": "Selection tracked successfully"}
 
 
+@router.post("/batch")
+async def track_batch(
+    request: ActivityBatchRequest,
+    user_id: int = Depends(get_current_user_id),
+    session=Depends(get_db_session),
+    buffer: ActivityWriteBuffer | None = Depends(get_activity_buffer),
+):
+    """Track an ordered list of swipes, views and selections in one transaction"""
+    challenge_ids = [event.challenge_id for event in request.events]
+    _, unknown = await ChallengeService(session=session).get_many(challenge_ids=challenge_ids)
+    skip = set(unknown)
+    events = [(event.activity_type, event.challenge_id) for event in request.events if event.challenge_id not in skip]
+    service = UserActivityService(session=session, buffer=buffer)
+    stored = await service.track_batch(user_id, events)
+    return {"stored": stored, "duplicates": len(events) - stored, "unknown": list(unknown)}
+
+
 @router.post("/favorite")
 async def add_favorite(
     request: FavoriteRequest,
@@ -144,7 +202,6 @@ async def get_swipes_today(
     session=Depends(get_db_session),
 ):
     """Get number of swipes used today"""
-    from datetime import date
     service = UserActivityService(session=session)
-    swipes = await service.get_swipes_today(user_id, date.today())
+    swipes = await service.get_swipes_today(user_id, utc_today())
     return {"swipes_today": swipes}
@@ -1,27 +1,43 @@
-from datetime import date
+from datetime import datetime, time, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException
+from redis.asyncio import Redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps.activity import get_activity_buffer
+from app.api.deps.redis import get_redis
 from app.db.session import get_db_session
+from app.repositories.user_daily_stats_repo import UserDailyStatsRepository, utc_today
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.services.daily_quota import clear_daily_quotas
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.post("/reset-today")
 async def reset_today_progress(
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ):
     """Reset today's progress for testing purposes"""
     try:
-        today = date.today()
+        start = datetime.combine(utc_today(), time.min, tzinfo=timezone.utc)
+        window = {"start": start, "end": start + timedelta(days=1)}
         
-        # Delete today's activities
+        # Delete today's activities; a range on created_at lets Postgres prune partitions
         stmt_activities = text("""
             DELETE FROM user_activities 
-            WHERE DATE(created_at) = :today
+            WHERE created_at >= :start AND created_at < :end
         """)
-        result_activities = await session.execute(stmt_activities, {"today": today})
+        result_activities = await session.execute(stmt_activities, window)
+        # Release today's once-per-user claims so the same views and selections can be tracked again
+        await session.execute(
+            text("DELETE FROM user_challenge_once WHERE created_at >= :start AND created_at < :end"),
+            window,
+        )
+        await UserDailyStatsRepository(session=session).reset_activity(day=start.date())
         
         await session.commit()
+        # Cached quota counters would keep serving the pre-reset counts
+        await clear_daily_quotas(day=start.date(), redis=redis)
         
         return {
             "message": "Today's progress has been reset successfully!",
@@ -30,4 +46,14 @@ async def reset_today_progress(
         
     except Exception as e:
         await session.rollback()
-        raise HTTPException(status_code=500, detail=f"Error resetting today's progress: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error resetting today's progress: {str(e)}")
+
+
+@router.get("/activity-buffer")
+async def activity_buffer_stats(
+    buffer: ActivityWriteBuffer | None = Depends(get_activity_buffer),
+):
+    """Queue depth and flush counters of the activity write-behind buffer"""
+    if buffer is None:
+        return {"enabled": False}
+    return {"enabled": True, **buffer.stats()}
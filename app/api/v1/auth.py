@@ -1,16 +1,26 @@
 from datetime import datetime, timezone
 import jwt
-from jwt import PyJWKClient
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-import httpx
 from pydantic import BaseModel, EmailStr
+from redis.asyncio import Redis
 
 from app.db.session import get_db_session
+from app.integrations.jwks import IdentityProviders
 from app.services.auth_service import AuthService
-from app.core.security import create_access_token, create_refresh_token, blacklist_token
+from app.services.token_revocation import TokenRevocationCache
+from app.core.security import (
+    blacklist_token,
+    create_access_token,
+    create_refresh_token,
+    publish_token_epoch,
+    token_id,
+)
 from app.core.settings import get_settings
-from app.api.deps.auth import get_current_user_id
+from app.api.deps.auth import get_current_user_id, get_revocation_cache
+from app.api.deps.identity import get_identity
+from app.api.deps.redis import get_redis
+from app.repositories.user_cache import get_user_cache
 from app.repositories.user_repo import UserRepository
 
 
@@ -59,21 +69,27 @@ async def verify(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
     settings = get_settings()
-    sub = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]).get("sub")
-    refresh = create_refresh_token(subject=str(sub))
+    claims = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    refresh = create_refresh_token(subject=str(claims.get("sub")), token_epoch=claims["token_epoch"])
     return TokenOut(access_token=token, refresh_token=refresh)
 
 
 @router.post("/refresh", response_model=TokenOut)
 async def refresh(
     payload: RefreshIn,
+    session=Depends(get_db_session),
 ):
     settings = get_settings()
     try:
         data = jwt.decode(payload.refresh_token, settings.jwt_refresh_secret, algorithms=[settings.jwt_algorithm])
+        user_id = int(data.get("sub"))
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    access = create_access_token(subject=str(data.get("sub")))
+    # Refresh tokens are long-lived, so always check them against the stored epoch
+    current_epoch = await UserRepository(session=session).get_token_epoch(user_id)
+    if current_epoch is None or int(data.get("token_epoch", 0)) < current_epoch:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    access = create_access_token(subject=str(user_id), token_epoch=current_epoch)
     return TokenOut(access_token=access)
 
 
@@ -81,14 +97,37 @@ async def refresh(
 async def logout(
     user_id: int = Depends(get_current_user_id),
     authorization: str = Header(..., alias="Authorization"),
+    redis: Redis = Depends(get_redis),
+    revocations: TokenRevocationCache | None = Depends(get_revocation_cache),
 ):
     settings = get_settings()
     token = authorization.split(" ", 1)[1]
     data = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-    issued_at = int(data.get("iat"))
+    jti = token_id(data)
     exp = int(data.get("exp"))
     ttl = max(0, exp - int(datetime.now(timezone.utc).timestamp()))
-    blacklist_token(jti=str(issued_at), ttl_seconds=ttl)
+    expires_at = await blacklist_token(jti=jti, ttl_seconds=ttl, redis=redis)
+    if revocations is not None and expires_at is not None:
+        revocations.add(jti=jti, expires_at=expires_at)
+    return
+
+
+@router.post("/logout-all", status_code=204)
+async def logout_all(
+    user_id: int = Depends(get_current_user_id),
+    session=Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
+    revocations: TokenRevocationCache | None = Depends(get_revocation_cache),
+):
+    """Revoke every access and refresh token of the current user."""
+    token_epoch = await UserRepository(session=session).bump_token_epoch(user_id)
+    await session.commit()
+    if token_epoch is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    get_user_cache().invalidate(user_id)
+    if revocations is not None:
+        revocations.set_token_epoch(user_id, token_epoch)
+    await publish_token_epoch(user_id=user_id, token_epoch=token_epoch, redis=redis)
     return
 
 
@@ -108,17 +147,17 @@ class LoginIn(BaseModel):
 async def login(
     payload: LoginIn,
     session=Depends(get_db_session),
+    identity: IdentityProviders = Depends(get_identity),
 ):
     settings = get_settings()
     user_repo = UserRepository(session=session)
 
     if payload.provider == "google":
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get("https://oauth2.googleapis.com/tokeninfo", params={"id_token": payload.id_token})
-        if resp.status_code != 200:
+        try:
+            token_info = await identity.google.verify(payload.id_token)
+        except jwt.InvalidTokenError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid id_token")
 
-        token_info = resp.json()
         email = token_info.get("email")
         if not email:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email not found in token")
@@ -126,8 +165,8 @@ async def login(
         user = await user_repo.create_if_not_exists(email=email)
         await session.commit()
 
-        access = create_access_token(subject=str(user.id))
-        refresh = create_refresh_token(subject=str(user.id))
+        access = create_access_token(subject=str(user.id), token_epoch=user.token_epoch)
+        refresh = create_refresh_token(subject=str(user.id), token_epoch=user.token_epoch)
         return {
             "user": {"id": user.id, "email": user.email, "provider": "google"},
             "tokens": {"access_token": access, "refresh_token": refresh, "token_type": "Bearer", "expires_in": 3600},
@@ -135,30 +174,8 @@ async def login(
 
     if payload.provider == "apple":
         try:
-            jwk_client = PyJWKClient("https://appleid.apple.com/auth/keys")
-            signing_key = jwk_client.get_signing_key_from_jwt(payload.id_token)
-
-            if settings.environment and settings.environment.lower() != "prod":
-                claims = jwt.decode(
-                    payload.id_token,
-                    key=signing_key.key,
-                    algorithms=["RS256"],
-                    options={
-                        "verify_aud": False,
-                        "verify_iss": False,
-                    },
-                    leeway=120,
-                )
-            else:
-                claims = jwt.decode(
-                    payload.id_token,
-                    key=signing_key.key,
-                    algorithms=["RS256"],
-                    audience=settings.apple_bundle_id or "somethingnewapp",
-                    issuer="https://appleid.apple.com",
-                    leeway=120,
-                )
-        except Exception:
+            claims = await identity.apple.verify(payload.id_token)
+        except jwt.InvalidTokenError:
             logging.getLogger(__name__).exception("Apple token verification failed (strict path)")
             # Dev-only fallback: decode without signature verification to unblock local testing
             if settings.environment and settings.environment.lower() != "prod":
@@ -182,8 +199,8 @@ async def login(
         user = await user_repo.create_if_not_exists(email=email)
         await session.commit()
 
-        access = create_access_token(subject=str(user.id))
-        refresh = create_refresh_token(subject=str(user.id))
+        access = create_access_token(subject=str(user.id), token_epoch=user.token_epoch)
+        refresh = create_refresh_token(subject=str(user.id), token_epoch=user.token_epoch)
         return {
             "user": {"id": user.id, "email": user.email, "provider": "apple"},
             "tokens": {"access_token": access, "refresh_token": refresh, "token_type": "Bearer", "expires_in": 3600},
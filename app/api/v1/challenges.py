@@ -1,40 +1,90 @@
-from typing import Sequence
+from typing import Literal, Sequence
 
+import json
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
+from app.core.http_cache import etag_matches, make_etag, not_modified, query_fingerprint, set_cache_headers
+from app.core.pagination import invalid_cursor, set_next_cursor
+from app.core.settings import get_settings
 from app.db.session import get_db_session
-from app.schemas.challenge import ChallengeRead
+from app.schemas.challenge import ChallengeBatchRead, ChallengeBatchRequest, ChallengeRead
 from app.services.challenge_service import ChallengeService
-from app.api.deps.auth import get_current_user_id
+from app.api.deps.auth import get_current_user_id, get_optional_user_id
 from app.services.challenge_completion_service import ChallengeCompletionService
 from app.repositories.challenge_completion_repo import ChallengeCompletionRepository
-from app.repositories.user_repo import UserRepository
 
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
 
+MAX_BATCH_QUERY_IDS = 100
+
+TagsMode = Literal["all", "any"]
+
+
+def _parse_tags(
+    raw: list[str] | None,
+) -> list[str] | None:
+    """Accept both `tags=a,b` and repeated `tags=a&tags=b`."""
+    if not raw:
+        return None
+    return [part.strip() for value in raw for part in value.split(",") if part.strip()] or None
+
+
+def _json_response(
+    body: bytes,
+) -> Response:
+    """Wrap pre-encoded JSON, skipping response_model validation and re-encoding."""
+    return Response(content=body, media_type="application/json")
+
+
+def _parse_ids(
+    raw: list[str],
+) -> list[int]:
+    """Accept both `ids=1,2,3` and repeated `ids=1&ids=2`."""
+    try:
+        return [int(part) for value in raw for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers")
+
 
 @router.get("/", response_model=list[ChallengeRead])
 async def list_challenges(
+    request: Request,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
     category: str | None = Query(default=None),
     size: str | None = Query(default=None),
     q: str | None = Query(default=None),
     free_only: bool = Query(default=False),
+    cursor: str | None = Query(default=None),
+    tags: list[str] | None = Query(default=None),
+    tags_mode: TagsMode = Query(default="all"),
     session=Depends(get_db_session),
 ):
+    settings = get_settings()
     service = ChallengeService(session=session)
-    items = await service.list(
-        limit=limit,
-        offset=offset,
-        category=category,
-        size=size,
-        q=q,
-        free_only=free_only,
-    )
-    return items
+    etag = make_etag("challenges", await service.catalog_version(), query_fingerprint(request))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.catalog_cache_control)
+    try:
+        page = await service.list(
+            limit=limit,
+            offset=offset,
+            category=category,
+            size=size,
+            q=q,
+            free_only=free_only,
+            cursor=cursor,
+            tags=_parse_tags(tags),
+            match_all_tags=tags_mode == "all",
+        )
+    except ValueError:
+        raise invalid_cursor()
+    response = _json_response(await service.encode_list(page.items))
+    set_next_cursor(response, page)
+    set_cache_headers(response, etag, settings.catalog_cache_control)
+    return response
 
 
 @router.get("/random", response_model=list[ChallengeRead])
@@ -43,72 +93,164 @@ async def get_random_challenges(
     category: str | None = Query(default=None),
     size: str | None = Query(default=None),
     free_only: bool = Query(default=False),
+    tags: list[str] | None = Query(default=None),
+    tags_mode: TagsMode = Query(default="all"),
+    exclude_seen: bool = Query(default=False),
+    user_id: int | None = Depends(get_optional_user_id),
     session=Depends(get_db_session),
 ):
-    """Get random challenges for daily use"""
+    """Get random challenges for daily use; `exclude_seen` puts unseen cards first"""
+    if exclude_seen and user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     service = ChallengeService(session=session)
     items = await service.get_random(
         limit=limit,
         category=category,
         size=size,
         free_only=free_only,
+        tags=_parse_tags(tags),
+        match_all_tags=tags_mode == "all",
+        user_id=user_id,
+        exclude_seen=exclude_seen,
     )
-    return items
+    return _json_response(await service.encode_list(items))
 
 
-@router.get("/{challenge_id}", response_model=ChallengeRead)
-async def get_challenge(
-    challenge_id: int,
+@router.get("/daily", response_model=list[ChallengeRead])
+async def get_daily_challenges(
+    request: Request,
+    limit: int = Query(default=5, ge=1, le=20),
+    category: str | None = Query(default=None),
+    size: str | None = Query(default=None),
+    free_only: bool = Query(default=False),
+    tags: list[str] | None = Query(default=None),
+    tags_mode: TagsMode = Query(default="all"),
+    user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
 ):
+    """Get the user's deck for today, identical on every refresh"""
+    settings = get_settings()
     service = ChallengeService(session=session)
-    item = await service.get(challenge_id=challenge_id)
-    if not item:
-        raise HTTPException(status_code=404)
-    return item
+    today = date.today()
+    etag = make_etag("daily", await service.catalog_version(), user_id, today, query_fingerprint(request))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.daily_cache_control)
+    items = await service.get_daily(
+        user_id=user_id,
+        day=today,
+        limit=limit,
+        category=category,
+        size=size,
+        free_only=free_only,
+        tags=_parse_tags(tags),
+        match_all_tags=tags_mode == "all",
+    )
+    response = _json_response(await service.encode_list(items))
+    set_cache_headers(response, etag, settings.daily_cache_control)
+    return response
 
 
-@router.post("/{challenge_id}/complete", status_code=201)
-async def complete_challenge(
-    challenge_id: int,
-    user_id: int = Depends(get_current_user_id),
+async def _batch_response(
+    service: ChallengeService,
+    challenge_ids: Sequence[int],
+) -> Response:
+    items, missing = await service.get_many(challenge_ids=challenge_ids)
+    body = b'{"items":' + await service.encode_list(items) + b',"missing":' + json.dumps(missing).encode() + b"}"
+    return _json_response(body)
+
+
+@router.get("/batch", response_model=ChallengeBatchRead)
+async def get_challenges_batch(
+    request: Request,
+    ids: list[str] = Query(...),
     session=Depends(get_db_session),
 ):
-    # Ensure challenge exists to avoid FK errors
-    challenge_service = ChallengeService(session=session)
-    item = await challenge_service.get(challenge_id=challenge_id)
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    """Fetch several challenges at once, keeping the requested order"""
+    challenge_ids = _parse_ids(ids)
+    if not challenge_ids or len(challenge_ids) > MAX_BATCH_QUERY_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Pass between 1 and {MAX_BATCH_QUERY_IDS} ids, or use POST for longer lists",
+        )
+    settings = get_settings()
+    service = ChallengeService(session=session)
+    etag = make_etag("batch", await service.catalog_version(), query_fingerprint(request))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.catalog_cache_control)
+    response = await _batch_response(service, challenge_ids)
+    set_cache_headers(response, etag, settings.catalog_cache_control)
+    return response
 
-    # Ensure user exists to avoid FK errors on completion
-    user_repo = UserRepository(session=session)
-    user = await user_repo.get_by_id(user_id=user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    service = ChallengeCompletionService(session=session)
-    try:
-        await service.complete_with_limit(
-            user_id=user_id,
-            challenge_id=challenge_id,
-            today=date.today(),
-        )
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+@router.post("/batch", response_model=ChallengeBatchRead)
+async def post_challenges_batch(
+    payload: ChallengeBatchRequest,
+    session=Depends(get_db_session),
+):
+    """Same as GET /batch for id lists too long for a query string"""
+    service = ChallengeService(session=session)
+    return await _batch_response(service, payload.ids)
 
 
 @router.get("/completions", response_model=list[dict])
 async def list_completions(
+    response: Response,
     date_from: date = Query(...),
     date_to: date = Query(...),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
 ):
     repo = ChallengeCompletionRepository(session=session)
-    items = await repo.list_for_period(user_id=user_id, date_from=date_from, date_to=date_to)
+    try:
+        page = await repo.list_for_period(
+            user_id=user_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise invalid_cursor()
+    set_next_cursor(response, page)
     return [
         {"id": i.id, "challenge_id": i.challenge_id, "created_at": i.created_at}
-        for i in items
+        for i in page.items
     ]
 
 
+@router.get("/{challenge_id}", response_model=ChallengeRead)
+async def get_challenge(
+    challenge_id: int,
+    request: Request,
+    session=Depends(get_db_session),
+):
+    settings = get_settings()
+    service = ChallengeService(session=session)
+    etag = make_etag("challenge", await service.catalog_version(), challenge_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.catalog_cache_control)
+    item = await service.get(challenge_id=challenge_id)
+    if not item:
+        raise HTTPException(status_code=404)
+    (payload,) = await service.encode([item])
+    response = _json_response(payload)
+    set_cache_headers(response, etag, settings.catalog_cache_control)
+    return response
+
+
+@router.post("/{challenge_id}/complete", status_code=201)
+async def complete_challenge(
+    challenge_id: int,
+    user_id: int = Depends(get_current_user_id),
+    session=Depends(get_db_session),
+):
+    service = ChallengeCompletionService(session=session)
+    result = await service.complete_with_limit(user_id=user_id, challenge_id=challenge_id)
+    if result.status == "challenge_not_found":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if result.status == "user_not_found":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if result.status == "daily_limit_exceeded":
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS)
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Request, Response
 
+from app.core.http_cache import etag_matches, make_etag, not_modified, set_cache_headers
+from app.core.settings import get_settings
 from app.db.session import get_db_session
-from app.models.meta import Category, Size, Tag
+from app.repositories.meta_catalog import get_meta_cache
 
 
 router = APIRouter(prefix="/meta", tags=["meta"])
 
 
 @router.get("/filters")
-async def meta_filters(session=Depends(get_db_session)):
-    cats = (await session.execute(select(Category.name).order_by(Category.name))).scalars().all()
-    sizes = (await session.execute(select(Size.name).order_by(Size.name))).scalars().all()
-    tags = (await session.execute(select(Tag.name).order_by(Tag.name))).scalars().all()
-    return {"categories": list(cats), "sizes": list(sizes), "tags": list(tags)}
-
-
+async def meta_filters(
+    request: Request,
+    response: Response,
+    session=Depends(get_db_session),
+):
+    settings = get_settings()
+    filters = await get_meta_cache().get(session=session)
+    etag = make_etag("meta", filters.version)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.meta_cache_control)
+    set_cache_headers(response, etag, settings.meta_cache_control)
+    return {"categories": list(filters.categories), "sizes": list(filters.sizes), "tags": list(filters.tags)}
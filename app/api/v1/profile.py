@@ -1,12 +1,12 @@
-from datetime import date, timedelta, datetime, timezone
+from datetime import date, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from app.api.deps.auth import get_current_user_id
+from app.api.deps.auth import get_current_user, get_current_user_id
 from app.db.session import get_db_session
-from app.repositories.challenge_completion_repo import ChallengeCompletionRepository
-from app.repositories.replacement_repo import ReplacementRepository
+from app.models.user import User
+from app.repositories.user_daily_stats_repo import UserDailyStatsRepository, utc_today
 
 
 router = APIRouter(prefix="/profile", tags=["profile"])
@@ -17,61 +17,75 @@ async def profile_day(
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
 ):
-    today = datetime.now(timezone.utc).date()
-    cc_repo = ChallengeCompletionRepository(session=session)
-    repl_repo = ReplacementRepository(session=session)
-    cc = await cc_repo.count_for_day(user_id=user_id, d=today)
-    repl = await repl_repo.count_for_day(user_id=user_id, d=today)
+    today = utc_today()
+    stats = await UserDailyStatsRepository(session=session).get(user_id=user_id, day=today)
+    cc = stats.completions if stats else 0
+    repl = stats.replacements if stats else 0
     passed = cc >= 1
     return {"challenges_today": cc, "replacements_today": repl, "day_passed": passed}
 
 
+# Longest range one /stats call may cover
+MAX_STATS_DAYS = 3 * 366
+
+
+def _run_lengths(
+    counts: list[int],
+) -> list[list[int]]:
+    """Encode daily counts as `[count, days]` runs, e.g. [0, 0, 2, 2, 2] -> [[0, 2], [2, 3]]."""
+    runs: list[list[int]] = []
+    for count in counts:
+        if runs and runs[-1][0] == count:
+            runs[-1][1] += 1
+        else:
+            runs.append([count, 1])
+    return runs
+
+
 @router.get("/stats")
 async def get_progress_stats(
-    user_id: int = Depends(get_current_user_id),
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+    compact: bool = Query(default=False),
+    user: User = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
-    """Get user's progress statistics for calendar and charts"""
-    cc_repo = ChallengeCompletionRepository(session=session)
-    
-    # Get completion data for the last 30 days
-    end_date = datetime.now(timezone.utc).date()
-    start_date = end_date - timedelta(days=30)
-    
-    daily_stats = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        completed_count = await cc_repo.count_for_day(user_id=user_id, d=current_date)
-        daily_stats.append({
-            "date": current_date.isoformat(),
-            "completed": completed_count
-        })
-        current_date += timedelta(days=1)
-    
-    # Calculate streak
-    streak = 0
-    check_date = end_date
-    while check_date >= start_date:
-        day_stats = next((stat for stat in daily_stats if stat["date"] == check_date.isoformat()), None)
-        if day_stats and day_stats["completed"] > 0:
-            streak += 1
-            check_date -= timedelta(days=1)
-        else:
-            break
-    
-    # Get total completed challenges
-    total_completed = sum(stat["completed"] for stat in daily_stats)
-    
-    return {
-        "daily_stats": daily_stats,
-        "streak": streak,
-        "total_completed": total_completed,
+    """Get user's progress statistics for calendar and charts
+
+    Defaults to the last 30 days. Streaks and `total_completed_all_time` are
+    read from the user row and do not depend on the range. `heatmap`
+    run-length encodes the daily completion counts from `period.start_date`;
+    with `compact=true` the per-day `daily_stats` list is left out.
+    """
+    today = utc_today()
+    end_date = date_to or today
+    start_date = date_from or end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+    if (end_date - start_date).days >= MAX_STATS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"date range must be at most {MAX_STATS_DAYS} days",
+        )
+
+    stats_repo = UserDailyStatsRepository(session=session)
+    days = await stats_repo.completions_by_day(user_id=user.id, date_from=start_date, date_to=end_date)
+    counts = [count for _, count in days]
+
+    body = {
+        "streak": user.streak_on(today),
+        "longest_streak": user.longest_streak,
+        "total_completed": sum(counts),
+        "total_completed_all_time": user.total_completed,
+        "heatmap": _run_lengths(counts),
         "period": {
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
         }
     }
+    if not compact:
+        body["daily_stats"] = [{"date": day.isoformat(), "completed": count} for day, count in days]
+    return body
 
 
 @router.get("/stats/test")
@@ -1,10 +1,12 @@
 from datetime import date
 from fastapi import Query
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
 from app.api.deps.auth import get_current_user_id
+from app.core.pagination import invalid_cursor, set_next_cursor
 from app.db.session import get_db_session
+from app.repositories.user_daily_stats_repo import utc_today
 from app.schemas.replacement import ReplacementCreate, ReplacementRead
 from app.services.replacement_service import ReplacementService
 from app.repositories.replacement_repo import ReplacementRepository
@@ -25,7 +27,7 @@ async def create_replacement(
             user_id=user_id,
             from_item=payload.from_item,
             to_item=payload.to_item,
-            today=date.today(),
+            today=utc_today(),
         )
         return obj
     except ValueError:
@@ -34,13 +36,26 @@ async def create_replacement(
 
 @router.get("/", response_model=list[ReplacementRead])
 async def list_replacements(
+    response: Response,
     date_from: date = Query(...),
     date_to: date = Query(...),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     user_id: int = Depends(get_current_user_id),
     session=Depends(get_db_session),
 ):
     repo = ReplacementRepository(session=session)
-    items = await repo.list_for_period(user_id=user_id, date_from=date_from, date_to=date_to)
-    return items
+    try:
+        page = await repo.list_for_period(
+            user_id=user_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise invalid_cursor()
+    set_next_cursor(response, page)
+    return page.items
 
 
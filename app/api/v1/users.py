@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, Header, HTTPException, status
 from app.db.session import get_db_session
 from app.schemas.user import UserRead
 from app.services.user_service import UserService
-from app.api.deps.auth import get_current_user_id
+from app.api.deps.auth import get_current_user
+from app.models.user import User
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -23,11 +24,8 @@ async def read_me(
 
 @router.get("/me-auth", response_model=UserRead)
 async def read_me_auth(
-    user_id: int = Depends(get_current_user_id),
-    session=Depends(get_db_session),
+    user: User = Depends(get_current_user),
 ):
-    service = UserService(session=session)
-    user = await service.get_or_create_by_email(email=f"{user_id}@example.com")
     return user
 
 
@@ -0,0 +1,51 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+
+def make_etag(
+    *parts: Any,
+) -> str:
+    """Build a strong ETag from the values a representation depends on."""
+    raw = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return f'"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def query_fingerprint(
+    request: Request,
+) -> str:
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def etag_matches(
+    request: Request,
+    etag: str,
+) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def not_modified(
+    etag: str,
+    cache_control: str,
+) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_cache_headers(
+    response: Response,
+    etag: str,
+    cache_control: str,
+) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
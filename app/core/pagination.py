@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, TypeVar
+
+from fastapi import HTTPException, Response, status
+
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True, slots=True)
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(
+    *values: Any,
+) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(
+    cursor: str,
+    size: int,
+) -> list[Any]:
+    """Unpack a cursor made by `encode_cursor` with `size` values.
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed or holds a different number of values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid_cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid_cursor")
+    return values
+
+
+def decode_datetime_cursor(
+    cursor: str,
+) -> tuple[datetime, int]:
+    """Unpack a `(created_at, id)` cursor."""
+    created_at, row_id = decode_cursor(cursor, size=2)
+    if not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError("invalid_cursor")
+    return datetime.fromisoformat(created_at), row_id
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_cursor(
+    response: Response,
+    page: Page[Any],
+) -> None:
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
@@ -0,0 +1,80 @@
+import asyncio
+from collections.abc import Iterable, Sequence
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.settings import get_settings
+
+
+# A Redis command as passed to `execute_command`, e.g. ("SETEX", key, 60, 1)
+RedisCommand = Sequence[Any]
+
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, Redis]" = WeakKeyDictionary()
+
+
+def create_async_redis() -> Redis:
+    """Build an asyncio Redis client over its own bounded connection pool.
+
+    When all `redis_max_connections` are busy, a command waits up to
+    `redis_pool_timeout_seconds` for one instead of failing right away.
+    """
+    settings = get_settings()
+    pool = BlockingConnectionPool.from_url(
+        url=settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_seconds,
+        socket_connect_timeout=settings.redis_connect_timeout_seconds,
+        socket_timeout=settings.redis_connect_timeout_seconds,
+    )
+    # The client owns the pool, so closing it disconnects the pool too
+    return Redis.from_pool(pool)
+
+
+def bind_async_redis(
+    client: Redis | None,
+) -> None:
+    """Make `client` the one `get_async_redis` returns on the running loop.
+
+    The app lifespan binds its shared client here so code that cannot take a
+    dependency (services, repositories) uses the same pool; None unbinds it.
+    """
+    loop = asyncio.get_running_loop()
+    if client is None:
+        _clients.pop(loop, None)
+    else:
+        _clients[loop] = client
+
+
+def get_async_redis() -> Redis:
+    """Return the asyncio Redis client for the running event loop.
+
+    Connections of `redis.asyncio` are bound to the loop that opened them, so
+    one client (and its pool) is kept per loop: the lifespan's shared client
+    when the app is running, else one created on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = create_async_redis()
+        _clients[loop] = client
+    return client
+
+
+async def execute_pipeline(
+    client: Redis,
+    commands: Iterable[RedisCommand],
+    transaction: bool = False,
+) -> list[Any]:
+    """Send `commands` in one round trip and return their replies in order.
+
+    Raises
+    ------
+    RedisError
+        If Redis is unreachable or a command fails.
+    """
+    async with client.pipeline(transaction=transaction) as pipe:
+        for command in commands:
+            pipe.execute_command(*command)
+        return await pipe.execute()
@@ -1,52 +1,135 @@
+import json
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import uuid4
+
 import jwt
-import redis
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
+from app.core.redis import execute_pipeline, get_async_redis
 from app.core.settings import get_settings
+from app.models.user import User
+
+
+@dataclass
+class Principal:
+    """The authenticated caller of one request.
+
+    Built once per request from the verified access token and kept on
+    `request.state.principal`. `user` is filled on first use by
+    `get_current_user` with a read-only snapshot of the `users` row.
+    """
+
+    user_id: int
+    jti: str
+    token_epoch: int
+    claims: dict[str, Any]
+    user: User | None = None
+
+
+def _token_payload(
+    subject: str,
+    token_epoch: int,
+    ttl_minutes: int,
+) -> dict:
+    now = datetime.now(timezone.utc)
+    exp = now + timedelta(minutes=ttl_minutes)
+    return {
+        "sub": subject,
+        "jti": uuid4().hex,
+        "token_epoch": token_epoch,
+        "iat": int(now.timestamp()),
+        "exp": int(exp.timestamp()),
+    }
 
 
 def create_access_token(
     subject: str,
+    token_epoch: int = 0,
 ) -> str:
     settings = get_settings()
-    now = datetime.now(timezone.utc)
-    exp = now + timedelta(minutes=settings.jwt_access_ttl_minutes)
-    payload = {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+    payload = _token_payload(subject, token_epoch, settings.jwt_access_ttl_minutes)
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
 def create_refresh_token(
     subject: str,
+    token_epoch: int = 0,
 ) -> str:
     settings = get_settings()
-    now = datetime.now(timezone.utc)
-    exp = now + timedelta(minutes=settings.jwt_refresh_ttl_minutes)
-    payload = {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+    payload = _token_payload(subject, token_epoch, settings.jwt_refresh_ttl_minutes)
     return jwt.encode(payload, settings.jwt_refresh_secret, algorithm=settings.jwt_algorithm)
 
 
-def is_token_blacklisted(
+def token_id(
+    claims: dict,
+) -> str:
+    """The id a token is blacklisted under; tokens issued before `jti` existed use `iat`."""
+    return str(claims.get("jti") or claims["iat"])
+
+
+def revocation_key(
     jti: str,
+) -> str:
+    return f"{get_settings().jwt_blacklist_prefix}{jti}"
+
+
+async def is_token_revoked(
+    jti: str,
+    redis: Redis | None = None,
 ) -> bool:
-    settings = get_settings()
+    """Check the Redis blacklist for one token id."""
     try:
-        r = redis.from_url(settings.redis_url)
-        return r.exists(f"{settings.jwt_blacklist_prefix}{jti}") == 1
-    except Exception:
+        return await (redis or get_async_redis()).exists(revocation_key(jti)) == 1
+    except (RedisError, OSError):
         # If Redis is unavailable, treat as not blacklisted to avoid 500
         return False
 
 
-def blacklist_token(
+async def blacklist_token(
     jti: str,
     ttl_seconds: int,
-) -> None:
+    redis: Redis | None = None,
+) -> int | None:
+    """Revoke one token until it expires and tell every API process about it.
+
+    Returns the unix time the revocation lapses, or None if nothing was stored.
+    """
+    if ttl_seconds <= 0:
+        return None
     settings = get_settings()
+    expires_at = int(datetime.now(timezone.utc).timestamp()) + ttl_seconds
+    message = json.dumps({"jti": jti, "exp": expires_at})
     try:
-        r = redis.from_url(settings.redis_url)
-        r.setex(name=f"{settings.jwt_blacklist_prefix}{jti}", time=ttl_seconds, value=1)
-    except Exception:
+        await execute_pipeline(
+            redis or get_async_redis(),
+            [
+                ("SETEX", revocation_key(jti), ttl_seconds, expires_at),
+                ("PUBLISH", settings.jwt_revocation_channel, message),
+            ],
+        )
+    except (RedisError, OSError):
         # If Redis is unavailable, skip blacklisting silently in development/local
-        return
+        return None
+    return expires_at
+
 
+async def publish_token_epoch(
+    user_id: int,
+    token_epoch: int,
+    redis: Redis | None = None,
+) -> None:
+    """Tell every API process that tokens of `user_id` below `token_epoch` are revoked.
 
+    Call after the new epoch is committed to `users.token_epoch`, the source
+    of truth. Processes that miss the message reload the epoch from the
+    database after their next reconcile.
+    """
+    settings = get_settings()
+    message = json.dumps({"user_id": user_id, "token_epoch": token_epoch})
+    try:
+        await (redis or get_async_redis()).publish(settings.jwt_revocation_channel, message)
+    except (RedisError, OSError):
+        return
@@ -30,6 +30,10 @@ class Settings(BaseSettings):
     # Database
     database_url: str | None = None
     redis_url: str = "redis://localhost:6379/0"
+    redis_connect_timeout_seconds: float = 0.5
+    redis_max_connections: int = 50
+    # How long a command waits for a free pooled connection before failing
+    redis_pool_timeout_seconds: float = 1.0
     rq_default_queue_name: str = "default"
     jwt_secret: str = "dev-secret"
     jwt_algorithm: str = "HS256"
@@ -37,9 +41,52 @@ class Settings(BaseSettings):
     jwt_refresh_secret: str = "dev-refresh-secret"
     jwt_refresh_ttl_minutes: int = 60 * 24 * 14
     jwt_blacklist_prefix: str = "jwt:blacklist:"
+    # Users whose token epoch each process keeps in memory (least recently used are evicted)
+    jwt_epoch_cache_size: int = 100_000
+    # Revocations are broadcast on this channel to each process's local cache
+    jwt_revocation_channel: str = "jwt:revocations"
+    jwt_revocation_reconcile_seconds: float = 60.0
+
+    # In-memory caches
+    catalog_version_check_seconds: float = 5.0
+    # Users loaded for authenticated requests (see `app/repositories/user_cache.py`)
+    user_cache_ttl_seconds: float = 5.0
+    user_cache_size: int = 10_000
+
+    # Daily quota counters in Redis
+    quota_prefix: str = "quota:"
+
+    # Per-user seen-challenge bitmaps in Redis
+    seen_set_prefix: str = "seen:"
+    seen_set_ttl_seconds: int = 60 * 60 * 24 * 30
+
+    # Write-behind buffering of activity events (off: every event commits in its request)
+    activity_write_behind: bool = False
+    activity_buffer_max_events: int = 10_000
+    activity_flush_batch_size: int = 500
+    activity_flush_interval_seconds: float = 1.0
+
+    # Monthly partitions of user_activities (retention None: keep every month)
+    activity_partitions_ahead_months: int = 3
+    activity_retention_months: int | None = None
+
+    # HTTP caching for catalog and meta reads
+    catalog_cache_control: str = "public, max-age=60"
+    meta_cache_control: str = "public, max-age=300"
+    daily_cache_control: str = "private, max-age=300"
 
     # Apple Sign In
     apple_bundle_id: str | None = "somethingnewapp"
+    apple_jwks_url: str = "https://appleid.apple.com/auth/keys"
+
+    # Google Sign In (audience is checked only when a client id is set)
+    google_client_id: str | None = None
+    google_jwks_url: str = "https://www.googleapis.com/oauth2/v3/certs"
+
+    # Provider signing keys cached in memory for ID-token verification
+    jwks_cache_ttl_seconds: float = 60 * 60
+    jwks_min_refresh_seconds: float = 60.0
+    jwks_http_timeout_seconds: float = 5.0
 
     admin_token: str | None = None
     s3_region: str | None = None
@@ -0,0 +1,232 @@
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import httpx
+import jwt
+from jwt import PyJWK
+from jwt.exceptions import InvalidKeyError, PyJWKError
+
+from app.core.logging import get_logger
+from app.core.settings import get_settings
+
+
+APPLE_ISSUERS = ("https://appleid.apple.com",)
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+
+# Both providers sign ID tokens with RSA keys
+_ALGORITHMS = ["RS256"]
+
+
+class JWKSError(jwt.InvalidTokenError):
+    """The key set could not be fetched, or has no key for the token."""
+
+
+class JWKSCache:
+    """Signing keys of one identity provider, fetched from its JWKS URL.
+
+    Keys are served from memory. Once they are older than `ttl_seconds` they
+    keep being served while a background task refetches them. A token with
+    an unknown `kid` (the provider rotated keys) triggers a refetch right
+    away, at most once per `min_refresh_seconds`, so junk tokens cannot make
+    us hammer the provider.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        http: httpx.AsyncClient,
+        ttl_seconds: float,
+        min_refresh_seconds: float,
+    ) -> None:
+        self.url = url
+        self.fetches = 0
+        self._http = http
+        self._ttl_seconds = ttl_seconds
+        self._min_refresh_seconds = min_refresh_seconds
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._background: asyncio.Task[None] | None = None
+        self._logger = get_logger("jwks")
+
+    async def get_signing_key(
+        self,
+        kid: str,
+    ) -> PyJWK:
+        """Return the key with id `kid`.
+
+        Raises
+        ------
+        JWKSError
+            If the key set cannot be fetched or does not contain `kid`.
+        """
+        if kid not in self._keys:
+            await self._refresh()
+        elif self._fetched_at is not None and time.monotonic() - self._fetched_at > self._ttl_seconds:
+            self._refresh_in_background()
+        key = self._keys.get(kid)
+        if key is None:
+            raise JWKSError(f"no signing key {kid!r} at {self.url}")
+        return key
+
+    async def close(
+        self,
+    ) -> None:
+        if self._background is not None:
+            self._background.cancel()
+            try:
+                await self._background
+            except asyncio.CancelledError:
+                pass
+            self._background = None
+
+    def _refresh_in_background(
+        self,
+    ) -> None:
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(
+        self,
+    ) -> None:
+        try:
+            await self._refresh()
+        except JWKSError as exc:
+            # Keep serving the keys we have; the next request retries
+            self._logger.warning("jwks_refresh_failed", url=self.url, error=str(exc))
+
+    async def _refresh(
+        self,
+    ) -> None:
+        async with self._lock:
+            # Whoever held the lock may have just refetched
+            if self._fetched_at is not None and time.monotonic() - self._fetched_at < self._min_refresh_seconds:
+                return
+            try:
+                resp = await self._http.get(self.url)
+                resp.raise_for_status()
+                entries = resp.json()["keys"]
+            except (httpx.HTTPError, ValueError, KeyError) as exc:
+                raise JWKSError(f"cannot fetch {self.url}: {exc}") from exc
+            keys: dict[str, PyJWK] = {}
+            for entry in entries:
+                try:
+                    key = PyJWK(entry)
+                except (InvalidKeyError, PyJWKError):
+                    # Key types we cannot use are skipped, not fatal
+                    continue
+                if key.key_id:
+                    keys[key.key_id] = key
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self.fetches += 1
+
+
+class IdTokenVerifier:
+    """Verifies one provider's ID tokens against its cached signing keys."""
+
+    def __init__(
+        self,
+        keys: JWKSCache,
+        issuers: Sequence[str],
+        audience: str | None,
+        verify_audience_and_issuer: bool = True,
+        leeway_seconds: int = 120,
+    ) -> None:
+        self.keys = keys
+        self._issuers = tuple(issuers)
+        self._audience = audience
+        self._verify_audience_and_issuer = verify_audience_and_issuer
+        self._leeway_seconds = leeway_seconds
+
+    async def verify(
+        self,
+        token: str,
+    ) -> dict[str, Any]:
+        """Return the claims of a valid token.
+
+        Raises
+        ------
+        jwt.InvalidTokenError
+            If the token is malformed, expired, signed by an unknown key or
+            issued for someone else (`JWKSError` when keys are the problem).
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise jwt.InvalidTokenError("token has no kid")
+        key = await self.keys.get_signing_key(kid)
+        check_audience = self._verify_audience_and_issuer and self._audience is not None
+        claims = jwt.decode(
+            token,
+            key=key.key,
+            algorithms=_ALGORITHMS,
+            audience=self._audience if check_audience else None,
+            options={"verify_aud": check_audience},
+            leeway=self._leeway_seconds,
+        )
+        if self._verify_audience_and_issuer and claims.get("iss") not in self._issuers:
+            raise jwt.InvalidIssuerError("unexpected issuer")
+        return claims
+
+
+class IdentityProviders:
+    """Apple and Google ID-token verifiers sharing one pooled HTTP client."""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient | None = None,
+    ) -> None:
+        settings = get_settings()
+        self._http = http or httpx.AsyncClient(timeout=settings.jwks_http_timeout_seconds)
+        strict = settings.environment.lower() == "prod"
+        self.apple = IdTokenVerifier(
+            keys=self._cache(settings.apple_jwks_url),
+            issuers=APPLE_ISSUERS,
+            audience=settings.apple_bundle_id or "somethingnewapp",
+            # Outside prod, tokens minted for other bundle ids are accepted
+            verify_audience_and_issuer=strict,
+        )
+        self.google = IdTokenVerifier(
+            keys=self._cache(settings.google_jwks_url),
+            issuers=GOOGLE_ISSUERS,
+            audience=settings.google_client_id,
+        )
+
+    def _cache(
+        self,
+        url: str,
+    ) -> JWKSCache:
+        settings = get_settings()
+        return JWKSCache(
+            url=url,
+            http=self._http,
+            ttl_seconds=settings.jwks_cache_ttl_seconds,
+            min_refresh_seconds=settings.jwks_min_refresh_seconds,
+        )
+
+    async def close(
+        self,
+    ) -> None:
+        await self.apple.keys.close()
+        await self.google.keys.close()
+        await self._http.aclose()
+
+
+_providers: "WeakKeyDictionary[asyncio.AbstractEventLoop, IdentityProviders]" = WeakKeyDictionary()
+
+
+def get_identity_providers() -> IdentityProviders:
+    """Return the verifiers for the running event loop, creating them on first use.
+
+    The app lifespan keeps its own instance on `app.state`; this one serves
+    code running without it (scripts, tests without lifespan).
+    """
+    loop = asyncio.get_running_loop()
+    providers = _providers.get(loop)
+    if providers is None:
+        providers = IdentityProviders()
+        _providers[loop] = providers
+    return providers
@@ -1,11 +1,58 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.logging import configure_logging, get_logger
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.redis import bind_async_redis, create_async_redis
 from app.core.sentry import init_sentry
+from app.integrations.jwks import IdentityProviders
 from app.core.settings import get_settings
 from app.db.session import build_engine_and_sessionmaker
 from app.api.router import api_router
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.services.token_revocation import TokenRevocationCache
+
+
+@asynccontextmanager
+async def lifespan(
+    application: FastAPI,
+) -> AsyncIterator[None]:
+    """Open shared clients and start background workers; drain and close them on shutdown."""
+    settings = get_settings()
+    redis = create_async_redis()
+    bind_async_redis(redis)
+    application.state.redis = redis
+    revocations = TokenRevocationCache(redis=redis, sessionmaker=application.state.db_sessionmaker)
+    revocations.start()
+    application.state.revocations = revocations
+    identity = IdentityProviders()
+    application.state.identity = identity
+    buffer: ActivityWriteBuffer | None = None
+    if settings.activity_write_behind:
+        buffer = ActivityWriteBuffer(
+            sessionmaker=application.state.db_sessionmaker,
+            max_size=settings.activity_buffer_max_events,
+            batch_size=settings.activity_flush_batch_size,
+            flush_interval_seconds=settings.activity_flush_interval_seconds,
+        )
+        buffer.start()
+    application.state.activity_buffer = buffer
+    try:
+        yield
+    finally:
+        if buffer is not None:
+            await buffer.close()
+            application.state.activity_buffer = None
+        await identity.close()
+        application.state.identity = None
+        await revocations.close()
+        application.state.revocations = None
+        application.state.redis = None
+        bind_async_redis(None)
+        await redis.aclose()
 
 
 def create_app() -> FastAPI:
@@ -29,6 +76,7 @@ def create_app() -> FastAPI:
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json",
+        lifespan=lifespan,
     )
 
     application.add_middleware(
@@ -37,6 +85,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
     )
 
     application.include_router(
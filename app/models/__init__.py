@@ -1 +1 @@
-from .user_activity import UserActivity, UserFavorite
\ No newline at end of file
+from .user_activity import UserActivity, UserChallengeOnce, UserFavorite
\ No newline at end of file
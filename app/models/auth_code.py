@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 import secrets
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, String
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -11,11 +11,15 @@ class AuthCode(Base):
     __tablename__ = "auth_codes"
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     code: Mapped[str] = mapped_column(String(64), index=True)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default="now()")
 
+    __table_args__ = (
+        Index("ix_auth_codes_user_created", "user_id", "created_at"),
+    )
+
     @staticmethod
     def make_code() -> str:
         return secrets.token_urlsafe(16)
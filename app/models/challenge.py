@@ -12,6 +12,8 @@ class Challenge(Base):
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False, unique=True, index=True)
     short_description: Mapped[str] = mapped_column(String(500), nullable=True)
+    title_rus: Mapped[str] = mapped_column(String(200), nullable=True)
+    short_description_rus: Mapped[str] = mapped_column(String(500), nullable=True)
     category: Mapped[str] = mapped_column(String(50), nullable=True)
     tags: Mapped[str] = mapped_column(String(200), nullable=True)
     size: Mapped[str] = mapped_column(String(16), nullable=False, default="small", server_default="small")
@@ -0,0 +1,16 @@
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ChallengeTag(Base):
+    """Normalized challenge <-> tag links, derived from `Challenge.tags`"""
+    __tablename__ = "challenge_tags"
+
+    challenge_id: Mapped[int] = mapped_column(ForeignKey("challenges.id", ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_challenge_tags_tag_id_challenge_id", "tag_id", "challenge_id"),
+    )
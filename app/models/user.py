@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Integer, String
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -48,6 +48,42 @@ class User(Base):
         server_default="0",
     )
 
+    # Completion progress, updated with every completion (see `ChallengeCompletionRepository.create_within_limit`).
+    # `current_streak` is the length of the run of days ending at `last_completion_day`.
+    current_streak: Mapped[int] = mapped_column(
+        type_=Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
+    longest_streak: Mapped[int] = mapped_column(
+        type_=Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
+    last_completion_day: Mapped[date | None] = mapped_column(
+        type_=Date,
+        nullable=True,
+    )
+
+    total_completed: Mapped[int] = mapped_column(
+        type_=Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
+    # Tokens carry the epoch they were issued at; bumping it revokes all of them
+    token_epoch: Mapped[int] = mapped_column(
+        type_=Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
     last_seen: Mapped[datetime | None] = mapped_column(
         type_=DateTime(timezone=True),
         nullable=True,
@@ -65,4 +101,11 @@ class User(Base):
         server_default="now()",
     )
 
-
+    def streak_on(
+        self,
+        day: date,
+    ) -> int:
+        """Current streak as of `day`; it survives until a full day passes without a completion."""
+        if self.last_completion_day is None or self.last_completion_day < day - timedelta(days=1):
+            return 0
+        return self.current_streak
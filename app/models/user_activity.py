@@ -1,19 +1,55 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 
 
 class UserActivity(Base):
-    """Track user activities like swipes, views, selections"""
+    """Track user activities like swipes, views, selections
+
+    Range-partitioned by month on `created_at`, so the primary key includes it.
+    Views and selections are stored at most once per user and challenge;
+    `UserChallengeOnce` enforces that across partitions.
+    """
     __tablename__ = "user_activities"
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
-    activity_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # 'swipe_left', 'swipe_right', 'view', 'select'
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    activity_type: Mapped[str] = mapped_column(String(50), nullable=False)  # 'swipe_left', 'swipe_right', 'view', 'select'
     challenge_id: Mapped[int] = mapped_column(ForeignKey("challenges.id", ondelete="CASCADE"), index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        nullable=False,
+        server_default="now()",
+    )
+
+    __table_args__ = (
+        # Serves per-user lookups by type and day; challenge_id allows index-only scans
+        Index(
+            "ix_user_activities_user_type_created",
+            "user_id",
+            "activity_type",
+            "created_at",
+            postgresql_include=["challenge_id"],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class UserChallengeOnce(Base):
+    """First view or selection of a challenge by a user
+
+    Not partitioned, so its primary key deduplicates across every month of
+    `user_activities` (see `UserActivityRepository.insert_rows`).
+    """
+    __tablename__ = "user_challenge_once"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    challenge_id: Mapped[int] = mapped_column(ForeignKey("challenges.id", ondelete="CASCADE"), primary_key=True)
+    activity_type: Mapped[str] = mapped_column(String(50), primary_key=True)  # 'view', 'select'
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default="now()")
 
 
@@ -0,0 +1,29 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserDailyStats(Base):
+    """Per-user counters for one UTC day, kept in step with the raw tables
+
+    Every write to `challenge_completions`, `replacements` or `user_activities`
+    bumps the matching counter in the same transaction
+    (see `UserDailyStatsRepository`).
+    """
+    __tablename__ = "user_daily_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    completions: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    replacements: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    swipes_left: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    swipes_right: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    views: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    selects: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+    @property
+    def swipes(self) -> int:
+        return self.swipes_left + self.swipes_right
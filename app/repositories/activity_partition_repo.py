@@ -0,0 +1,113 @@
+import re
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+PARENT_TABLE = "user_activities"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(
+    d: date,
+) -> date:
+    return d.replace(day=1)
+
+
+def add_months(
+    month: date,
+    months: int,
+) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(
+    month: date,
+) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+class ActivityPartitionRepository:
+    """DDL for the monthly range partitions of `user_activities`.
+
+    Partitions cover [first of month, first of next month) in UTC. Rows
+    for a month without a partition land in the DEFAULT partition, so
+    inserts keep working if maintenance falls behind; creating the month
+    moves them over.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+    ) -> None:
+        self.session = session
+
+    async def list_months(
+        self,
+    ) -> list[date]:
+        res = await self.session.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:parent AS regclass)
+                """
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        months = []
+        for (name,) in res.all():
+            match = _PARTITION_RE.match(name)
+            if match:
+                months.append(date(int(match[1]), int(match[2]), 1))
+        return sorted(months)
+
+    async def create(
+        self,
+        month: date,
+    ) -> int:
+        """Create the partition of `month`; returns the rows moved into it from the default partition.
+
+        A partition cannot be added while the default one holds rows of its
+        range, so the table is filled first and attached afterwards.
+        """
+        name = partition_name(month)
+        start = f"{month.isoformat()} 00:00:00+00"
+        end = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+        await self.session.execute(
+            text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        )
+        res = await self.session.execute(
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE created_at >= :start AND created_at < :end
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """
+            ),
+            {
+                "start": datetime.combine(month, time.min, tzinfo=timezone.utc),
+                "end": datetime.combine(add_months(month, 1), time.min, tzinfo=timezone.utc),
+            },
+        )
+        await self.session.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+        )
+        return res.rowcount
+
+    async def drop(
+        self,
+        month: date,
+    ) -> None:
+        name = partition_name(month)
+        # Detaching first keeps the lock on the parent short
+        await self.session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await self.session.execute(text(f"DROP TABLE {name}"))
@@ -0,0 +1,44 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cache_version import CacheVersion
+
+
+CATALOG_VERSION_KEY = "catalog"
+META_VERSION_KEY = "meta"
+
+
+class CacheVersionRepository:
+    def __init__(
+        self,
+        session: AsyncSession,
+    ) -> None:
+        self.session = session
+
+    async def get(
+        self,
+        key: str,
+    ) -> int:
+        stmt = select(CacheVersion.version).where(CacheVersion.key == key)
+        res = await self.session.execute(stmt)
+        return int(res.scalar_one_or_none() or 0)
+
+    async def bump(
+        self,
+        key: str,
+    ) -> int:
+        stmt = (
+            insert(CacheVersion)
+            .values(key=key, version=1)
+            .on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "version": CacheVersion.version + 1,
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(CacheVersion.version)
+        )
+        res = await self.session.execute(stmt)
+        return int(res.scalar_one())
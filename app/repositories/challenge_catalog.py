@@ -0,0 +1,116 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property, lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.models.challenge import Challenge
+from app.models.challenge_tag import ChallengeTag
+from app.models.meta import Tag
+from app.repositories.cache_version_repo import CATALOG_VERSION_KEY, CacheVersionRepository
+from app.repositories.challenge_sampler import ChallengeSampler
+from app.repositories.challenge_search import ChallengeSearchIndex
+from app.repositories.challenge_tag_index import ChallengeTagIndex
+from app.repositories.versioned_cache import VersionedCache
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogChallenge:
+    """Immutable copy of a `Challenge` row, safe to share between requests"""
+
+    id: int
+    title: str
+    short_description: str | None
+    title_rus: str | None
+    short_description_rus: str | None
+    category: str | None
+    tags: str | None
+    size: str
+    estimated_duration_min: int | None
+    is_premium_only: bool
+    created_at: datetime
+    updated_at: datetime
+    tag_names: tuple[str, ...] = ()
+
+
+class ChallengeCatalog:
+    """In-memory view of the whole challenges table for one catalog version."""
+
+    def __init__(
+        self,
+        version: int,
+        items: Sequence[CatalogChallenge],
+    ) -> None:
+        self.version = version
+        self.items: tuple[CatalogChallenge, ...] = tuple(sorted(items, key=lambda c: c.id))
+        self.by_id: dict[int, CatalogChallenge] = {c.id: c for c in self.items}
+        self.tag_index = ChallengeTagIndex(items=self.items)
+        self.sampler = ChallengeSampler(items=self.items, tag_index=self.tag_index)
+        # Encoded API representations by id, filled lazily by the service layer
+        self.payloads: dict[int, bytes] = {}
+
+    @cached_property
+    def search_index(
+        self,
+    ) -> ChallengeSearchIndex:
+        return ChallengeSearchIndex(items=self.items)
+
+
+async def load_challenge_catalog(
+    session: AsyncSession,
+    version: int,
+) -> ChallengeCatalog:
+    tag_rows = await session.execute(
+        select(ChallengeTag.challenge_id, Tag.name)
+        .join(Tag, Tag.id == ChallengeTag.tag_id)
+        .order_by(ChallengeTag.challenge_id, Tag.name)
+    )
+    tag_names: dict[int, list[str]] = {}
+    for challenge_id, name in tag_rows.all():
+        tag_names.setdefault(challenge_id, []).append(name)
+    res = await session.execute(select(Challenge).order_by(Challenge.id))
+    items = [
+        CatalogChallenge(
+            id=row.id,
+            title=row.title,
+            short_description=row.short_description,
+            title_rus=row.title_rus,
+            short_description_rus=row.short_description_rus,
+            category=row.category,
+            tags=row.tags,
+            size=row.size,
+            estimated_duration_min=row.estimated_duration_min,
+            is_premium_only=row.is_premium_only,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            tag_names=tuple(tag_names.get(row.id, ())),
+        )
+        for row in res.scalars().all()
+    ]
+    return ChallengeCatalog(version=version, items=items)
+
+
+@lru_cache(maxsize=1)
+def get_challenge_catalog_cache() -> VersionedCache[ChallengeCatalog]:
+    """Return the process-wide challenge catalog cache."""
+    settings = get_settings()
+    return VersionedCache(
+        key=CATALOG_VERSION_KEY,
+        loader=load_challenge_catalog,
+        check_interval_seconds=settings.catalog_version_check_seconds,
+    )
+
+
+async def bump_catalog_version(
+    session: AsyncSession,
+) -> int:
+    """Mark the catalog as changed for every API worker.
+
+    Call this in the same transaction as the writes to `challenges`.
+    """
+    version = await CacheVersionRepository(session=session).bump(key=CATALOG_VERSION_KEY)
+    get_challenge_catalog_cache().invalidate()
+    return version
@@ -1,15 +1,28 @@
+from dataclasses import dataclass
 from datetime import date, datetime, time, timezone
+from typing import Literal
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, exists, func, literal, select, true, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import Page, decode_datetime_cursor, encode_cursor
+from app.models.challenge import Challenge
 from app.models.challenge_completion import ChallengeCompletion
+from app.models.user import User
+from app.models.user_daily_stats import UserDailyStats
+from app.repositories.user_daily_stats_repo import TODAY_UTC
+from app.repositories.user_repo import completion_progress
 
 
-def _day_bounds(d: date) -> tuple[datetime, datetime]:
-    start = datetime.combine(d, time.min, tzinfo=timezone.utc)
-    end = datetime.combine(d, time.max, tzinfo=timezone.utc)
-    return start, end
+CompletionStatus = Literal["created", "challenge_not_found", "user_not_found", "daily_limit_exceeded"]
+
+
+@dataclass(frozen=True, slots=True)
+class CompletionResult:
+    status: CompletionStatus
+    id: int | None = None
+    created_at: datetime | None = None
 
 
 class ChallengeCompletionRepository:
@@ -19,52 +32,102 @@ class ChallengeCompletionRepository:
     ) -> None:
         self.session = session
 
-    async def count_for_day(
-        self,
-        user_id: int,
-        d: date,
-    ) -> int:
-        start, end = _day_bounds(d)
-        stmt = select(func.count(ChallengeCompletion.id)).where(
-            and_(
-                ChallengeCompletion.user_id == user_id,
-                ChallengeCompletion.created_at >= start,
-                ChallengeCompletion.created_at <= end,
-            )
-        )
-        res = await self.session.execute(stmt)
-        return int(res.scalar_one() or 0)
-
-    async def create(
+    async def create_within_limit(
         self,
         user_id: int,
         challenge_id: int,
-    ) -> ChallengeCompletion:
-        obj = ChallengeCompletion(user_id=user_id, challenge_id=challenge_id)
-        self.session.add(obj)
-        await self.session.flush()
-        return obj
+        daily_limit: int,
+    ) -> CompletionResult:
+        """Check challenge, user and today's limit, then insert, in one statement.
+
+        Today's rollup row is the gate: its counter is only bumped while it is
+        below `daily_limit`, and ON CONFLICT DO UPDATE re-checks that against
+        the latest row version, so concurrent requests cannot both pass. Only
+        when the gate lets the request through are the completion inserted
+        and the user's streak and total advanced. The caller commits.
+        """
+        challenge = select(Challenge.id).where(Challenge.id == challenge_id).cte("challenge")
+        user = select(User.id).where(User.id == user_id).cte("target_user")
+        gate = insert(UserDailyStats).from_select(
+            ["user_id", "day", "completions"],
+            select(user.c.id, TODAY_UTC, literal(1)).select_from(user.join(challenge, true())),
+        )
+        slot = gate.on_conflict_do_update(
+            index_elements=[UserDailyStats.user_id, UserDailyStats.day],
+            set_={"completions": UserDailyStats.completions + 1},
+            where=UserDailyStats.completions < daily_limit,
+        ).returning(UserDailyStats.user_id).cte("slot")
+        created = (
+            insert(ChallengeCompletion)
+            .from_select(["user_id", "challenge_id"], select(slot.c.user_id, literal(challenge_id)))
+            .returning(ChallengeCompletion.id, ChallengeCompletion.created_at)
+            .cte("created")
+        )
+        progress = (
+            update(User)
+            .where(User.id == user_id, exists(select(created.c.id)))
+            .values(**completion_progress())
+            .returning(User.id)
+            .cte("progress")
+        )
+        stmt = select(
+            exists(select(challenge.c.id)),
+            exists(select(user.c.id)),
+            select(created.c.id).scalar_subquery(),
+            select(created.c.created_at).scalar_subquery(),
+            # Referenced so the UPDATE is rendered; it runs either way
+            select(func.count()).select_from(progress).scalar_subquery(),
+        )
+        challenge_found, user_found, completion_id, created_at, _ = (await self.session.execute(stmt)).one()
+        if completion_id is not None:
+            return CompletionResult(status="created", id=completion_id, created_at=created_at)
+        if not challenge_found:
+            return CompletionResult(status="challenge_not_found")
+        if not user_found:
+            return CompletionResult(status="user_not_found")
+        return CompletionResult(status="daily_limit_exceeded")
 
     async def list_for_period(
         self,
         user_id: int,
         date_from: date,
         date_to: date,
-    ) -> list[ChallengeCompletion]:
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> Page[ChallengeCompletion]:
+        """List newest first; pages are keyed on `(created_at, id)`.
+
+        Without `limit` the whole period is returned, as before.
+
+        Raises
+        ------
+        ValueError
+            If `cursor` is malformed.
+        """
         start = datetime.combine(date_from, time.min, tzinfo=timezone.utc)
         end = datetime.combine(date_to, time.max, tzinfo=timezone.utc)
+        conds = [
+            ChallengeCompletion.user_id == user_id,
+            ChallengeCompletion.created_at >= start,
+            ChallengeCompletion.created_at <= end,
+        ]
+        if cursor:
+            last_created_at, last_id = decode_datetime_cursor(cursor)
+            conds.append(
+                tuple_(ChallengeCompletion.created_at, ChallengeCompletion.id) < tuple_(last_created_at, last_id)
+            )
         stmt = (
             select(ChallengeCompletion)
-            .where(
-                and_(
-                    ChallengeCompletion.user_id == user_id,
-                    ChallengeCompletion.created_at >= start,
-                    ChallengeCompletion.created_at <= end,
-                )
-            )
-            .order_by(ChallengeCompletion.created_at.desc())
+            .where(and_(*conds))
+            .order_by(ChallengeCompletion.created_at.desc(), ChallengeCompletion.id.desc())
         )
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
         res = await self.session.execute(stmt)
-        return list(res.scalars().all())
+        items = list(res.scalars().all())
+        if limit is None or len(items) <= limit:
+            return Page(items=items)
+        last = items[limit - 1]
+        return Page(items=items[:limit], next_cursor=encode_cursor(last.created_at, last.id))
 
 
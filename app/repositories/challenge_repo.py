@@ -1,19 +1,35 @@
-from typing import Sequence
+from bisect import bisect_right
+from typing import Container, Sequence
 import random
 
-from sqlalchemy import and_, or_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.challenge import Challenge
+from app.core.pagination import Page, decode_cursor, encode_cursor
+from app.repositories.challenge_catalog import (
+    CatalogChallenge,
+    ChallengeCatalog,
+    get_challenge_catalog_cache,
+)
+from app.repositories.challenge_sampler import filter_key
+
+
+_NO_FILTERS = filter_key()
 
 
 class ChallengeRepository:
+    """Challenge reads, served from the in-memory catalog snapshot."""
+
     def __init__(
         self,
         session: AsyncSession,
     ) -> None:
         self.session = session
 
+    async def catalog(
+        self,
+    ) -> ChallengeCatalog:
+        return await get_challenge_catalog_cache().get(session=self.session)
+
     async def list_all(
         self,
         limit: int = 50,
@@ -22,31 +38,82 @@ class ChallengeRepository:
         size: str | None = None,
         q: str | None = None,
         free_only: bool = False,
-    ) -> Sequence[Challenge]:
-        stmt = select(Challenge)
-        conds = []
-        if category:
-            conds.append(Challenge.category == category)
-        if size:
-            conds.append(Challenge.size == size)
+        cursor: str | None = None,
+        tags: Sequence[str] | None = None,
+        match_all_tags: bool = True,
+    ) -> Page[CatalogChallenge]:
+        """List challenges by id, or by search rank when `q` is given.
+
+        Filters resolve to one of the sampler's sorted id pools. `cursor`
+        resumes right after the last item of a previous page, the in-memory
+        equivalent of `WHERE id > :last_id`; `offset` is applied after it for
+        clients that still page by offset.
+
+        Raises
+        ------
+        ValueError
+            If `cursor` was not issued for this kind of listing.
+        """
+        catalog = await self.catalog()
+        key = filter_key(
+            category=category,
+            size=size,
+            free_only=free_only,
+            tags=tags,
+            match_all=match_all_tags,
+        )
+        pool = catalog.sampler.pool(key)
+        start = 0
         if q:
-            like = f"%{q}%"
-            conds.append(or_(Challenge.title.ilike(like), Challenge.short_description.ilike(like)))
-        if free_only:
-            conds.append(Challenge.is_premium_only.is_(False))
-        if conds:
-            stmt = stmt.where(and_(*conds))
-        stmt = stmt.order_by(Challenge.id).limit(limit).offset(offset)
-        res = await self.session.execute(stmt)
-        return list(res.scalars().all())
+            # Ranked full-text matches replace id order
+            hits = catalog.search_index.search(q)
+            if key != _NO_FILTERS:
+                allowed = set(pool)
+                hits = [hit for hit in hits if hit[0] in allowed]
+            if cursor:
+                score, last_id = decode_cursor(cursor, size=2)
+                if not isinstance(score, (int, float)) or not isinstance(last_id, int):
+                    raise ValueError("invalid_cursor")
+                start = bisect_right(hits, (-score, last_id), key=lambda hit: (-hit[1], hit[0]))
+            window = hits[start + offset:start + offset + limit + 1]
+            page = [catalog.by_id[challenge_id] for challenge_id, _ in window]
+            if len(page) <= limit:
+                return Page(items=page)
+            score, last_id = window[limit - 1]
+            return Page(items=page[:limit], next_cursor=encode_cursor(score, last_id))
+        if cursor:
+            (last_id,) = decode_cursor(cursor, size=1)
+            if not isinstance(last_id, int):
+                raise ValueError("invalid_cursor")
+            start = bisect_right(pool, last_id)
+        ids = pool[start + offset:start + offset + limit + 1]
+        page = [catalog.by_id[challenge_id] for challenge_id in ids]
+        if len(page) <= limit:
+            return Page(items=page)
+        return Page(items=page[:limit], next_cursor=encode_cursor(page[limit - 1].id))
 
     async def get_by_id(
         self,
         challenge_id: int,
-    ) -> Challenge | None:
-        stmt = select(Challenge).where(Challenge.id == challenge_id)
-        res = await self.session.execute(stmt)
-        return res.scalar_one_or_none()
+    ) -> CatalogChallenge | None:
+        catalog = await self.catalog()
+        return catalog.by_id.get(challenge_id)
+
+    async def get_many(
+        self,
+        challenge_ids: Sequence[int],
+    ) -> tuple[list[CatalogChallenge], list[int]]:
+        """Resolve ids in request order; returns found items and missing ids."""
+        catalog = await self.catalog()
+        found: list[CatalogChallenge] = []
+        missing: list[int] = []
+        for challenge_id in dict.fromkeys(challenge_ids):
+            item = catalog.by_id.get(challenge_id)
+            if item is None:
+                missing.append(challenge_id)
+            else:
+                found.append(item)
+        return found, missing
 
     async def get_random(
         self,
@@ -54,25 +121,23 @@ class ChallengeRepository:
         category: str | None = None,
         size: str | None = None,
         free_only: bool = False,
-    ) -> Sequence[Challenge]:
-        """Get random challenges with optional filters"""
-        stmt = select(Challenge)
-        conds = []
-        
-        if category:
-            conds.append(Challenge.category == category)
-        if size:
-            conds.append(Challenge.size == size)
-        if free_only:
-            conds.append(Challenge.is_premium_only.is_(False))
-            
-        if conds:
-            stmt = stmt.where(and_(*conds))
-        
-        # Используем func.random() для получения случайных записей
-        stmt = stmt.order_by(func.random()).limit(limit)
-        
-        res = await self.session.execute(stmt)
-        return list(res.scalars().all())
-
-
+        tags: Sequence[str] | None = None,
+        match_all_tags: bool = True,
+        exclude: Container[int] | None = None,
+        rng: random.Random | None = None,
+    ) -> Sequence[CatalogChallenge]:
+        """Get random challenges with optional filters, preferring ids not in `exclude`"""
+        catalog = await self.catalog()
+        ids = catalog.sampler.sample(
+            key=filter_key(
+                category=category,
+                size=size,
+                free_only=free_only,
+                tags=tags,
+                match_all=match_all_tags,
+            ),
+            k=limit,
+            exclude=exclude,
+            rng=rng,
+        )
+        return [catalog.by_id[i] for i in ids]
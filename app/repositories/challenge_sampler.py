@@ -0,0 +1,196 @@
+from array import array
+from bisect import bisect_right
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable, Container, Iterable, Sequence
+from itertools import accumulate
+from typing import TYPE_CHECKING
+import random
+
+from app.repositories.challenge_tag_index import ChallengeTagIndex, normalize_tag
+
+if TYPE_CHECKING:
+    from app.repositories.challenge_catalog import CatalogChallenge
+
+
+# (category, size, free_only, tags, match_all)
+FilterKey = tuple[str | None, str | None, bool, tuple[str, ...], bool]
+
+# Tag combinations are open-ended, so their pools are cached LRU-style
+_MAX_TAG_POOLS = 256
+
+_rng = random.Random()
+
+
+def filter_key(
+    category: str | None = None,
+    size: str | None = None,
+    free_only: bool = False,
+    tags: Sequence[str] | None = None,
+    match_all: bool = True,
+) -> FilterKey:
+    normalized = tuple(sorted({normalize_tag(t) for t in tags or () if t.strip()}))
+    return (category or None, size or None, bool(free_only), normalized, bool(match_all) or not normalized)
+
+
+def seeded_rng(
+    *parts: object,
+) -> random.Random:
+    """Return a generator seeded from `parts`, giving the same draws on every process."""
+    raw = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return random.Random(int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big"))
+
+
+class ChallengeSampler:
+    """Random draws over precomputed id arrays, one per filter combination.
+
+    Every (category, size, free_only) combination that can match at least one
+    challenge gets its own sorted `array('q')` of ids when the catalog is
+    loaded, so drawing `limit` distinct ids costs O(limit) regardless of the
+    catalog size. Pools narrowed by tags are derived on first use from the
+    tag index and kept in a bounded LRU. With `weight_of`, cumulative weights
+    are precomputed per pool and draws take O(limit * log n).
+    """
+
+    def __init__(
+        self,
+        items: Sequence["CatalogChallenge"],
+        tag_index: ChallengeTagIndex | None = None,
+        weight_of: Callable[["CatalogChallenge"], float] | None = None,
+    ) -> None:
+        pools: dict[FilterKey, "array[int]"] = {}
+        for item in items:
+            for key in self._keys_for(item):
+                pools.setdefault(key, array("q")).append(item.id)
+        self._pools = pools
+        self._by_id = {item.id: item for item in items}
+        self._tag_index = tag_index or ChallengeTagIndex(items=items)
+        self._tag_pools: OrderedDict[FilterKey, "array[int]"] = OrderedDict()
+        self._weights: dict[int, float] | None = None
+        self._cum_weights: dict[FilterKey, list[float]] = {}
+        if weight_of is not None:
+            self._weights = {item.id: max(0.0, float(weight_of(item))) for item in items}
+            for key, ids in pools.items():
+                self._cum_weights[key] = self._accumulate(ids)
+
+    @staticmethod
+    def _keys_for(
+        item: "CatalogChallenge",
+    ) -> Iterable[FilterKey]:
+        for category in {None, item.category or None}:
+            for size in {None, item.size or None}:
+                yield (category, size, False, (), True)
+                if not item.is_premium_only:
+                    yield (category, size, True, (), True)
+
+    def _accumulate(
+        self,
+        ids: Sequence[int],
+    ) -> list[float]:
+        assert self._weights is not None
+        return list(accumulate(self._weights[i] for i in ids))
+
+    def _build_tag_pool(
+        self,
+        key: FilterKey,
+    ) -> "array[int]":
+        category, size, free_only, tags, match_all = key
+        pool = array("q")
+        for challenge_id in self._tag_index.match(tags, match_all=match_all):
+            item = self._by_id[challenge_id]
+            if category and item.category != category:
+                continue
+            if size and item.size != size:
+                continue
+            if free_only and item.is_premium_only:
+                continue
+            pool.append(challenge_id)
+        return pool
+
+    def pool(
+        self,
+        key: FilterKey,
+    ) -> Sequence[int]:
+        """Return the sorted ids matching `key` (empty if none do)."""
+        if not key[3]:
+            return self._pools.get(key, ())
+        pool = self._tag_pools.get(key)
+        if pool is None:
+            pool = self._build_tag_pool(key)
+            self._tag_pools[key] = pool
+            if len(self._tag_pools) > _MAX_TAG_POOLS:
+                evicted, _ = self._tag_pools.popitem(last=False)
+                self._cum_weights.pop(evicted, None)
+        else:
+            self._tag_pools.move_to_end(key)
+        return pool
+
+    def sample(
+        self,
+        key: FilterKey,
+        k: int,
+        rng: random.Random | None = None,
+        exclude: Container[int] | None = None,
+    ) -> list[int]:
+        """Draw up to `k` distinct ids matching `key`.
+
+        Ids in `exclude` are only drawn, after all others, when too few
+        remain to fill `k`; such draws are uniform even with `weight_of`.
+        """
+        rng = rng or _rng
+        ids = self.pool(key)
+        k = min(k, len(ids))
+        if k <= 0:
+            return []
+        if exclude is not None:
+            return self._sample_excluding(ids, k, rng, exclude)
+        if self._weights is None:
+            return [ids[i] for i in rng.sample(range(len(ids)), k)]
+        cum_weights = self._cum_weights.get(key)
+        if cum_weights is None:
+            cum_weights = self._cum_weights[key] = self._accumulate(ids)
+        return self._weighted_sample(ids, cum_weights, k, rng)
+
+    @staticmethod
+    def _sample_excluding(
+        ids: Sequence[int],
+        k: int,
+        rng: random.Random,
+        exclude: Container[int],
+    ) -> list[int]:
+        chosen: dict[int, None] = {}
+        # Random probes are enough while most of the pool is unseen
+        attempts = 4 * k + 16
+        while len(chosen) < k and attempts:
+            attempts -= 1
+            index = rng.randrange(len(ids))
+            if ids[index] not in exclude:
+                chosen.setdefault(index, None)
+        if len(chosen) < k:
+            unseen = [i for i in range(len(ids)) if i not in chosen and ids[i] not in exclude]
+            chosen.update(dict.fromkeys(rng.sample(unseen, min(k - len(chosen), len(unseen)))))
+        if len(chosen) < k:
+            seen = [i for i in range(len(ids)) if ids[i] in exclude]
+            chosen.update(dict.fromkeys(rng.sample(seen, k - len(chosen))))
+        return [ids[i] for i in chosen]
+
+    @staticmethod
+    def _weighted_sample(
+        ids: Sequence[int],
+        cum_weights: list[float],
+        k: int,
+        rng: random.Random,
+    ) -> list[int]:
+        total = cum_weights[-1]
+        chosen: dict[int, None] = {}
+        if total > 0:
+            # Rejection of repeats stays cheap while k is small relative to the pool
+            attempts = 8 * k + 32
+            while len(chosen) < k and attempts:
+                attempts -= 1
+                index = bisect_right(cum_weights, rng.random() * total)
+                chosen.setdefault(index, None)
+        if len(chosen) < k:
+            rest = [i for i in range(len(ids)) if i not in chosen]
+            chosen.update(dict.fromkeys(rng.sample(rest, k - len(chosen))))
+        return [ids[i] for i in chosen]
@@ -0,0 +1,94 @@
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from math import log
+from typing import TYPE_CHECKING
+import re
+
+if TYPE_CHECKING:
+    from app.repositories.challenge_catalog import CatalogChallenge
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Field weights: a hit in a title outranks a hit in a description
+_FIELD_WEIGHTS = (
+    ("title", 3.0),
+    ("title_rus", 3.0),
+    ("short_description", 1.0),
+    ("short_description_rus", 1.0),
+)
+
+# A term that only matches as a prefix scores less than an exact token
+_PREFIX_FACTOR = 0.5
+
+
+def tokenize(
+    text: str,
+) -> list[str]:
+    return _TOKEN_RE.findall(text.casefold().replace("ё", "е"))
+
+
+class ChallengeSearchIndex:
+    """In-memory inverted index over English and Russian titles and descriptions.
+
+    Every query term must match (AND). A term matches tokens equal to it or,
+    through a sorted vocabulary, tokens it is a prefix of. Results are ranked
+    by the sum of field-weighted, idf-scaled term scores, then by id.
+    """
+
+    def __init__(
+        self,
+        items: Sequence["CatalogChallenge"],
+    ) -> None:
+        postings: dict[str, dict[int, float]] = {}
+        for item in items:
+            for field, weight in _FIELD_WEIGHTS:
+                value = getattr(item, field)
+                if not value:
+                    continue
+                for token in set(tokenize(value)):
+                    scores = postings.setdefault(token, {})
+                    scores[item.id] = max(scores.get(item.id, 0.0), weight)
+        total = max(len(items), 1)
+        self._postings = postings
+        self._idf = {token: 1.0 + log(total / len(docs)) for token, docs in postings.items()}
+        self._vocabulary = sorted(postings)
+
+    def _expand(
+        self,
+        term: str,
+    ) -> Iterator[str]:
+        vocabulary = self._vocabulary
+        index = bisect_left(vocabulary, term)
+        while index < len(vocabulary) and vocabulary[index].startswith(term):
+            yield vocabulary[index]
+            index += 1
+
+    def search(
+        self,
+        q: str,
+    ) -> list[tuple[int, float]]:
+        """Return `(id, score)` for challenges matching every term of `q`, best first."""
+        terms = tokenize(q)
+        if not terms:
+            return []
+        ranked: dict[int, float] | None = None
+        for term in dict.fromkeys(terms):
+            term_scores: dict[int, float] = {}
+            for token in self._expand(term):
+                factor = self._idf[token] * (1.0 if token == term else _PREFIX_FACTOR)
+                for challenge_id, weight in self._postings[token].items():
+                    score = weight * factor
+                    if score > term_scores.get(challenge_id, 0.0):
+                        term_scores[challenge_id] = score
+            if ranked is None:
+                ranked = term_scores
+            else:
+                ranked = {
+                    challenge_id: score + term_scores[challenge_id]
+                    for challenge_id, score in ranked.items()
+                    if challenge_id in term_scores
+                }
+            if not ranked:
+                return []
+        return sorted((ranked or {}).items(), key=lambda hit: (-hit[1], hit[0]))
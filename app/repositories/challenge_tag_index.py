@@ -0,0 +1,46 @@
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.repositories.challenge_catalog import CatalogChallenge
+
+
+def normalize_tag(
+    tag: str,
+) -> str:
+    return tag.strip().casefold()
+
+
+class ChallengeTagIndex:
+    """Posting lists of challenge ids per tag, kept sorted by id."""
+
+    def __init__(
+        self,
+        items: Sequence["CatalogChallenge"],
+    ) -> None:
+        postings: dict[str, "array[int]"] = {}
+        for item in items:
+            for tag in item.tag_names:
+                postings.setdefault(normalize_tag(tag), array("q")).append(item.id)
+        self._postings = postings
+
+    def match(
+        self,
+        tags: Sequence[str],
+        match_all: bool = True,
+    ) -> list[int]:
+        """Return sorted ids tagged with all (or any) of `tags`."""
+        lists = [self._postings.get(normalize_tag(tag), ()) for tag in dict.fromkeys(tags)]
+        if not lists:
+            return []
+        if match_all:
+            lists.sort(key=len)
+            result = set(lists[0])
+            for ids in lists[1:]:
+                if not result:
+                    break
+                result.intersection_update(ids)
+        else:
+            result = set().union(*lists)
+        return sorted(result)
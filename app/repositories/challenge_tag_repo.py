@@ -0,0 +1,43 @@
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.challenge_tag import ChallengeTag
+
+
+_INSERT_MISSING_TAGS = text(
+    """
+    INSERT INTO tags (name)
+    SELECT DISTINCT btrim(t.name)
+    FROM challenges c
+    CROSS JOIN LATERAL unnest(string_to_array(c.tags, ',')) AS t(name)
+    WHERE btrim(t.name) <> ''
+    ON CONFLICT (name) DO NOTHING
+    """
+)
+
+_LINK_TAGS = text(
+    """
+    INSERT INTO challenge_tags (challenge_id, tag_id)
+    SELECT DISTINCT c.id, tg.id
+    FROM challenges c
+    CROSS JOIN LATERAL unnest(string_to_array(c.tags, ',')) AS t(name)
+    JOIN tags tg ON tg.name = btrim(t.name)
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+class ChallengeTagRepository:
+    def __init__(
+        self,
+        session: AsyncSession,
+    ) -> None:
+        self.session = session
+
+    async def sync_from_challenges(
+        self,
+    ) -> None:
+        """Rebuild `challenge_tags` from the comma-separated `challenges.tags` column."""
+        await self.session.execute(delete(ChallengeTag))
+        await self.session.execute(_INSERT_MISSING_TAGS)
+        await self.session.execute(_LINK_TAGS)
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.models.meta import Category, Size, Tag
+from app.repositories.cache_version_repo import META_VERSION_KEY, CacheVersionRepository
+from app.repositories.versioned_cache import VersionedCache
+
+
+@dataclass(frozen=True, slots=True)
+class MetaFilters:
+    version: int
+    categories: tuple[str, ...]
+    sizes: tuple[str, ...]
+    tags: tuple[str, ...]
+
+
+async def load_meta_filters(
+    session: AsyncSession,
+    version: int,
+) -> MetaFilters:
+    cats = (await session.execute(select(Category.name).order_by(Category.name))).scalars().all()
+    sizes = (await session.execute(select(Size.name).order_by(Size.name))).scalars().all()
+    tags = (await session.execute(select(Tag.name).order_by(Tag.name))).scalars().all()
+    return MetaFilters(
+        version=version,
+        categories=tuple(cats),
+        sizes=tuple(sizes),
+        tags=tuple(tags),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_meta_cache() -> VersionedCache[MetaFilters]:
+    """Return the process-wide cache of filter values."""
+    settings = get_settings()
+    return VersionedCache(
+        key=META_VERSION_KEY,
+        loader=load_meta_filters,
+        check_interval_seconds=settings.catalog_version_check_seconds,
+    )
+
+
+async def bump_meta_version(
+    session: AsyncSession,
+) -> int:
+    """Mark categories, sizes and tags as changed for every API worker."""
+    version = await CacheVersionRepository(session=session).bump(key=META_VERSION_KEY)
+    get_meta_cache().invalidate()
+    return version
@@ -1,15 +1,11 @@
 from datetime import date, datetime, time, timezone
 
-from sqlalchemy import and_, func, insert, select
+from sqlalchemy import and_, insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import Page, decode_datetime_cursor, encode_cursor
 from app.models.replacement import Replacement
-
-
-def _day_bounds(d: date) -> tuple[datetime, datetime]:
-    start = datetime.combine(d, time.min, tzinfo=timezone.utc)
-    end = datetime.combine(d, time.max, tzinfo=timezone.utc)
-    return start, end
+from app.repositories.user_daily_stats_repo import UserDailyStatsRepository
 
 
 class ReplacementRepository:
@@ -18,22 +14,7 @@ class ReplacementRepository:
         session: AsyncSession,
     ) -> None:
         self.session = session
-
-    async def count_for_day(
-        self,
-        user_id: int,
-        d: date,
-    ) -> int:
-        start, end = _day_bounds(d)
-        stmt = select(func.count(Replacement.id)).where(
-            and_(
-                Replacement.user_id == user_id,
-                Replacement.created_at >= start,
-                Replacement.created_at <= end,
-            )
-        )
-        res = await self.session.execute(stmt)
-        return int(res.scalar_one() or 0)
+        self.stats_repo = UserDailyStatsRepository(session=session)
 
     async def create(
         self,
@@ -44,6 +25,7 @@ class ReplacementRepository:
         obj = Replacement(user_id=user_id, from_item=from_item, to_item=to_item)
         self.session.add(obj)
         await self.session.flush()
+        await self.stats_repo.increment(user_id=user_id, counter="replacements")
         return obj
 
     async def list_for_period(
@@ -51,21 +33,42 @@ class ReplacementRepository:
         user_id: int,
         date_from: date,
         date_to: date,
-    ) -> list[Replacement]:
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> Page[Replacement]:
+        """List newest first; pages are keyed on `(created_at, id)`.
+
+        Without `limit` the whole period is returned, as before.
+
+        Raises
+        ------
+        ValueError
+            If `cursor` is malformed.
+        """
         start = datetime.combine(date_from, time.min, tzinfo=timezone.utc)
         end = datetime.combine(date_to, time.max, tzinfo=timezone.utc)
+        conds = [
+            Replacement.user_id == user_id,
+            Replacement.created_at >= start,
+            Replacement.created_at <= end,
+        ]
+        if cursor:
+            last_created_at, last_id = decode_datetime_cursor(cursor)
+            conds.append(
+                tuple_(Replacement.created_at, Replacement.id) < tuple_(last_created_at, last_id)
+            )
         stmt = (
             select(Replacement)
-            .where(
-                and_(
-                    Replacement.user_id == user_id,
-                    Replacement.created_at >= start,
-                    Replacement.created_at <= end,
-                )
-            )
-            .order_by(Replacement.created_at.desc())
+            .where(and_(*conds))
+            .order_by(Replacement.created_at.desc(), Replacement.id.desc())
         )
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
         res = await self.session.execute(stmt)
-        return list(res.scalars().all())
+        items = list(res.scalars().all())
+        if limit is None or len(items) <= limit:
+            return Page(items=items)
+        last = items[limit - 1]
+        return Page(items=items[:limit], next_cursor=encode_cursor(last.created_at, last.id))
 
 
@@ -0,0 +1,121 @@
+from collections.abc import Container, Iterable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import execute_pipeline, get_async_redis
+from app.core.settings import get_settings
+from app.models.user_activity import UserActivity
+
+
+SEEN_ACTIVITY_TYPES = ("view", "swipe_left", "swipe_right")
+
+# Challenge ids start at 1, so bit 0 is free to mark a bitmap as complete
+_READY_BIT = 0
+
+
+class SeenBitmap:
+    """Membership test over a Redis bitmap where bit `n` set means id `n` was seen."""
+
+    __slots__ = ("_bits",)
+
+    def __init__(
+        self,
+        bits: bytes,
+    ) -> None:
+        self._bits = bits
+
+    def __contains__(
+        self,
+        challenge_id: object,
+    ) -> bool:
+        if not isinstance(challenge_id, int) or challenge_id < 0:
+            return False
+        index = challenge_id >> 3
+        # Redis numbers bits from the most significant bit of each byte
+        return index < len(self._bits) and bool(self._bits[index] & (0x80 >> (challenge_id & 7)))
+
+
+class SeenChallengeRepository:
+    """Per-user set of viewed or swiped challenge ids, kept as a Redis bitmap.
+
+    The bitmap is rebuilt from `user_activities` whenever it is missing or
+    was created by `mark_seen` before a full load (its ready bit is unset).
+    Without Redis every read falls back to the database.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis: Redis | None = None,
+    ) -> None:
+        self.session = session
+        self.redis = redis
+
+    def _client(
+        self,
+    ) -> Redis:
+        return self.redis or get_async_redis()
+
+    @staticmethod
+    def _key(
+        user_id: int,
+    ) -> str:
+        return f"{get_settings().seen_set_prefix}{user_id}"
+
+    async def mark_seen(
+        self,
+        user_id: int,
+        challenge_id: int,
+    ) -> None:
+        await self.mark_seen_many(user_id=user_id, challenge_ids=[challenge_id])
+
+    async def mark_seen_many(
+        self,
+        user_id: int,
+        challenge_ids: Iterable[int],
+    ) -> None:
+        key = self._key(user_id)
+        commands = [("SETBIT", key, challenge_id, 1) for challenge_id in challenge_ids]
+        commands.append(("EXPIRE", key, get_settings().seen_set_ttl_seconds))
+        try:
+            await execute_pipeline(self._client(), commands)
+        except (RedisError, OSError):
+            # The next read rebuilds the bitmap from the database
+            return
+
+    async def get_seen(
+        self,
+        user_id: int,
+    ) -> Container[int]:
+        key = self._key(user_id)
+        try:
+            bits = await self._client().get(key)
+        except (RedisError, OSError):
+            return frozenset(await self._load(user_id))
+        if bits and bits[0] & 0x80:
+            return SeenBitmap(bits)
+        ids = await self._load(user_id)
+        commands = [("SETBIT", key, _READY_BIT, 1)]
+        commands.extend(("SETBIT", key, challenge_id, 1) for challenge_id in ids)
+        commands.append(("EXPIRE", key, get_settings().seen_set_ttl_seconds))
+        try:
+            await execute_pipeline(self._client(), commands)
+        except (RedisError, OSError):
+            pass
+        return frozenset(ids)
+
+    async def _load(
+        self,
+        user_id: int,
+    ) -> list[int]:
+        stmt = select(UserActivity.challenge_id).where(
+            and_(
+                UserActivity.user_id == user_id,
+                UserActivity.activity_type.in_(SEEN_ACTIVITY_TYPES),
+            )
+        ).distinct()
+        res = await self.session.execute(stmt)
+        return list(res.scalars().all())
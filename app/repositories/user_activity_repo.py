@@ -1,21 +1,26 @@
-from datetime import date, datetime, time, timezone
-from typing import List
+from collections import defaultdict
+from typing import List, Sequence
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import BigInteger, String, and_, column, select, union_all, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user_activity import UserActivity, UserFavorite
+from app.models.challenge import Challenge
+from app.models.user_activity import UserActivity, UserChallengeOnce, UserFavorite
+from app.repositories.user_daily_stats_repo import ACTIVITY_COUNTERS, UserDailyStatsRepository
 
 
-def _day_bounds(d: date) -> tuple[datetime, datetime]:
-    start = datetime.combine(d, time.min, tzinfo=timezone.utc)
-    end = datetime.combine(d, time.max, tzinfo=timezone.utc)
-    return start, end
+# (user_id, activity_type, challenge_id)
+ActivityRow = tuple[int, str, int]
+
+# Recorded at most once per user and challenge
+ONCE_ACTIVITY_TYPES = ("view", "select")
 
 
 class UserActivityRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
+        self.stats_repo = UserDailyStatsRepository(session)
 
     async def create_activity(
         self,
@@ -30,20 +35,72 @@ class UserActivityRepository:
         )
         self.session.add(obj)
         await self.session.flush()
+        await self.stats_repo.increment(user_id, ACTIVITY_COUNTERS[activity_type])
         return obj
 
-    async def count_swipes_today(self, user_id: int, today: date) -> int:
-        start, end = _day_bounds(today)
-        stmt = select(func.count(UserActivity.id)).where(
-            and_(
-                UserActivity.user_id == user_id,
-                UserActivity.activity_type.in_(['swipe_left', 'swipe_right']),
-                UserActivity.created_at >= start,
-                UserActivity.created_at <= end,
+    async def create_once(
+        self,
+        user_id: int,
+        activity_type: str,
+        challenge_id: int,
+    ) -> bool:
+        """Record a view or selection in one statement; False if it already existed."""
+        return await self.insert_rows([(user_id, activity_type, challenge_id)]) == 1
+
+    async def insert_rows(
+        self,
+        rows: Sequence[ActivityRow],
+    ) -> int:
+        """Insert `(user_id, activity_type, challenge_id)` rows with one statement.
+
+        Views and selections are first claimed in `user_challenge_once`; only
+        the ones claimed now are stored, so a repeat is skipped whatever month
+        the first one fell in, as is one repeated within `rows`. Rows for
+        challenges that do not exist are skipped too. The daily rollup counts
+        only the inserted rows. Returns the number of rows inserted.
+        """
+        if not rows:
+            return 0
+        given = values(
+            column("user_id", BigInteger),
+            column("activity_type", String),
+            column("challenge_id", BigInteger),
+            name="rows",
+        ).data(list(rows))
+        # Challenges deleted (or never known) by now are dropped instead of failing the batch
+        data = select(given).where(given.c.challenge_id.in_(select(Challenge.id))).cte("data")
+        claimed = (
+            insert(UserChallengeOnce)
+            .from_select(
+                ["user_id", "challenge_id", "activity_type"],
+                select(data.c.user_id, data.c.challenge_id, data.c.activity_type).where(
+                    data.c.activity_type.in_(ONCE_ACTIVITY_TYPES)
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(UserChallengeOnce.user_id, UserChallengeOnce.activity_type, UserChallengeOnce.challenge_id)
+            .cte("claimed")
+        )
+        stmt = (
+            insert(UserActivity)
+            .from_select(
+                ["user_id", "activity_type", "challenge_id"],
+                union_all(
+                    select(data.c.user_id, data.c.activity_type, data.c.challenge_id).where(
+                        data.c.activity_type.not_in(ONCE_ACTIVITY_TYPES)
+                    ),
+                    select(claimed.c.user_id, claimed.c.activity_type, claimed.c.challenge_id),
+                ),
             )
+            .returning(UserActivity.user_id, UserActivity.activity_type)
         )
         res = await self.session.execute(stmt)
-        return int(res.scalar_one() or 0)
+        inserted = res.fetchall()
+        counts: defaultdict[int, defaultdict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for user_id, activity_type in inserted:
+            counts[user_id][ACTIVITY_COUNTERS[activity_type]] += 1
+        await self.stats_repo.add_counts(counts)
+        return len(inserted)
 
     async def get_viewed_challenges(self, user_id: int) -> List[int]:
         stmt = select(UserActivity.challenge_id).where(
@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.models.user import User
+from app.repositories.user_repo import UserRepository
+
+
+def _snapshot(
+    user: User,
+) -> User:
+    """Copy the loaded columns into a `User` that belongs to no session.
+
+    A session-bound instance would be expired by that session's next
+    rollback, and reading it from another request would then try to load.
+    """
+    return User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+
+
+class UserCache:
+    """Process-local read-through cache of `users` rows, kept for `ttl_seconds`.
+
+    Entries are detached snapshots shared by concurrent requests: read them,
+    never modify them or add them to a session. Writes made by this process
+    call `invalidate`; writes made elsewhere show up once the entry expires.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_size: int,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        # user_id -> (loaded at, snapshot), least recently used first
+        self._entries: OrderedDict[int, tuple[float, User]] = OrderedDict()
+
+    async def get(
+        self,
+        session: AsyncSession,
+        user_id: int,
+    ) -> User | None:
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and now - entry[0] < self._ttl_seconds:
+            self._entries.move_to_end(user_id)
+            return entry[1]
+        user = await UserRepository(session=session).get_by_id(user_id=user_id)
+        if user is None:
+            self._entries.pop(user_id, None)
+            return None
+        snapshot = _snapshot(user)
+        self._entries[user_id] = (now, snapshot)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(
+        self,
+        user_id: int,
+    ) -> None:
+        """Make the next read of `user_id` go to the database."""
+        self._entries.pop(user_id, None)
+
+
+@lru_cache(maxsize=1)
+def get_user_cache() -> UserCache:
+    """Return the process-wide user cache."""
+    settings = get_settings()
+    return UserCache(
+        ttl_seconds=settings.user_cache_ttl_seconds,
+        max_size=settings.user_cache_size,
+    )
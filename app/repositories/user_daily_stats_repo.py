@@ -0,0 +1,160 @@
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import Date, and_, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user_daily_stats import UserDailyStats
+
+
+COUNTERS = ("completions", "replacements", "swipes_left", "swipes_right", "views", "selects")
+
+# user_activities.activity_type -> counter column
+ACTIVITY_COUNTERS = {
+    "swipe_left": "swipes_left",
+    "swipe_right": "swipes_right",
+    "view": "views",
+    "select": "selects",
+}
+
+# The UTC day of the transaction timestamp, which is what the raw rows'
+# `created_at` defaults to, so rollup and raw rows always agree on the day
+TODAY_UTC = cast(func.timezone("UTC", func.now()), Date)
+
+
+def utc_today() -> date:
+    """Today's UTC date: the rollup day of a write made now (see `TODAY_UTC`).
+
+    Use it wherever a day is matched against the rollup or a daily quota,
+    never the server-local `date.today()`.
+    """
+    return datetime.now(timezone.utc).date()
+
+# Recomputes [start, end) from the raw tables, overwriting what is there
+_REBUILD = text(
+    """
+    INSERT INTO user_daily_stats (user_id, day, completions, replacements, swipes_left, swipes_right, views, selects)
+    SELECT user_id, day, sum(completions), sum(replacements), sum(swipes_left), sum(swipes_right), sum(views), sum(selects)
+    FROM (
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date AS day,
+               count(*) AS completions, 0 AS replacements, 0 AS swipes_left, 0 AS swipes_right, 0 AS views, 0 AS selects
+        FROM challenge_completions WHERE created_at >= :start AND created_at < :end GROUP BY 1, 2
+        UNION ALL
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, 0, count(*), 0, 0, 0, 0
+        FROM replacements WHERE created_at >= :start AND created_at < :end GROUP BY 1, 2
+        UNION ALL
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, 0, 0,
+               count(*) FILTER (WHERE activity_type = 'swipe_left'),
+               count(*) FILTER (WHERE activity_type = 'swipe_right'),
+               count(*) FILTER (WHERE activity_type = 'view'),
+               count(*) FILTER (WHERE activity_type = 'select')
+        FROM user_activities WHERE created_at >= :start AND created_at < :end GROUP BY 1, 2
+    ) AS counts
+    GROUP BY user_id, day
+    """
+)
+
+
+class UserDailyStatsRepository:
+    """Upserts and reads of the `user_daily_stats` rollup."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+    ) -> None:
+        self.session = session
+
+    async def increment(
+        self,
+        user_id: int,
+        counter: str,
+        amount: int = 1,
+    ) -> None:
+        """Add `amount` to one of today's counters; call in the transaction of the write."""
+        await self.add_counts({user_id: {counter: amount}})
+
+    async def add_counts(
+        self,
+        counts: Mapping[int, Mapping[str, int]],
+    ) -> None:
+        """Add `{user_id: {counter: amount}}` to today's rows with one upsert.
+
+        Rows are written in user order so concurrent batches lock them in the
+        same order.
+        """
+        rows = [
+            {"user_id": user_id, "day": TODAY_UTC, **{c: counts[user_id].get(c, 0) for c in COUNTERS}}
+            for user_id in sorted(counts)
+            if any(counts[user_id].values())
+        ]
+        if not rows:
+            return
+        stmt = insert(UserDailyStats).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserDailyStats.user_id, UserDailyStats.day],
+            set_={c: getattr(UserDailyStats, c) + getattr(stmt.excluded, c) for c in COUNTERS},
+        )
+        await self.session.execute(stmt)
+
+    async def get(
+        self,
+        user_id: int,
+        day: date,
+    ) -> UserDailyStats | None:
+        return await self.session.get(UserDailyStats, (user_id, day))
+
+    async def completions_by_day(
+        self,
+        user_id: int,
+        date_from: date,
+        date_to: date,
+    ) -> list[tuple[date, int]]:
+        """One `(day, completions)` pair per day of `[date_from, date_to]`, zeros included."""
+        days = select(
+            cast(func.generate_series(date_from, date_to, timedelta(days=1)), Date).label("day")
+        ).subquery()
+        stmt = (
+            select(days.c.day, func.coalesce(UserDailyStats.completions, 0))
+            .select_from(days)
+            .outerjoin(
+                UserDailyStats,
+                and_(UserDailyStats.user_id == user_id, UserDailyStats.day == days.c.day),
+            )
+            .order_by(days.c.day)
+        )
+        res = await self.session.execute(stmt)
+        return [(day, count) for day, count in res.all()]
+
+    async def reset_activity(
+        self,
+        day: date,
+    ) -> None:
+        """Zero the activity counters of `day` for every user."""
+        await self.session.execute(
+            UserDailyStats.__table__.update()
+            .where(UserDailyStats.day == day)
+            .values(swipes_left=0, swipes_right=0, views=0, selects=0)
+        )
+
+    async def rebuild(
+        self,
+        date_from: date,
+        date_to: date,
+    ) -> int:
+        """Recompute the rows of `[date_from, date_to]` from the raw tables.
+
+        Holds a lock that blocks concurrent counter upserts until the caller
+        commits, so writes racing the rebuild are neither lost nor counted
+        twice. Returns the number of rows written.
+        """
+        start = datetime.combine(date_from, time.min, tzinfo=timezone.utc)
+        end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        await self.session.execute(text("LOCK TABLE user_daily_stats IN SHARE ROW EXCLUSIVE MODE"))
+        await self.session.execute(
+            UserDailyStats.__table__.delete().where(
+                and_(UserDailyStats.day >= date_from, UserDailyStats.day <= date_to)
+            )
+        )
+        res = await self.session.execute(_REBUILD, {"start": start, "end": end})
+        return res.rowcount
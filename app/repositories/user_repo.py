@@ -1,9 +1,65 @@
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import BigInteger, any_, bindparam, case, func, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
+from app.repositories.user_daily_stats_repo import TODAY_UTC
+
+
+# Gaps and islands over days with a completion: consecutive days share
+# `day - row_number()`, so each group is one streak
+_RECOMPUTE_PROGRESS = text(
+    """
+    WITH days AS (
+        SELECT user_id, day, completions,
+               day - CAST(row_number() OVER (PARTITION BY user_id ORDER BY day) AS int) AS run
+        FROM user_daily_stats
+        WHERE completions > 0 AND (CAST(:user_id AS bigint) IS NULL OR user_id = :user_id)
+    ),
+    runs AS (
+        SELECT user_id, count(*) AS length, max(day) AS last_day, sum(completions) AS completions
+        FROM days GROUP BY user_id, run
+    ),
+    progress AS (
+        SELECT user_id,
+               (array_agg(length ORDER BY last_day DESC))[1] AS current_streak,
+               max(length) AS longest_streak,
+               max(last_day) AS last_completion_day,
+               sum(completions) AS total_completed
+        FROM runs GROUP BY user_id
+    )
+    UPDATE users u
+    SET current_streak = coalesce(p.current_streak, 0),
+        longest_streak = coalesce(p.longest_streak, 0),
+        last_completion_day = p.last_completion_day,
+        total_completed = coalesce(p.total_completed, 0)
+    FROM users target
+    LEFT JOIN progress p ON p.user_id = target.id
+    WHERE u.id = target.id AND (CAST(:user_id AS bigint) IS NULL OR u.id = :user_id)
+    """
+)
+
+
+def completion_progress() -> dict:
+    """UPDATE values that advance a user's streak and total for a completion made now.
+
+    Uses the same UTC day as the daily rollup. A second completion on the
+    same day leaves the streak as it is.
+    """
+    day = TODAY_UTC
+    streak = case(
+        (User.last_completion_day >= day, User.current_streak),
+        (User.last_completion_day == day - 1, User.current_streak + 1),
+        else_=1,
+    )
+    return {
+        "current_streak": streak,
+        "longest_streak": func.greatest(User.longest_streak, streak),
+        "last_completion_day": func.greatest(User.last_completion_day, day),
+        "total_completed": User.total_completed + 1,
+    }
 
 
 class UserRepository:
@@ -43,4 +99,43 @@ class UserRepository:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def recompute_progress(
+        self,
+        user_id: int | None = None,
+    ) -> int:
+        """Rebuild streaks and totals from `user_daily_stats` for one user or all.
+
+        Returns the number of users updated.
+        """
+        res = await self.session.execute(_RECOMPUTE_PROGRESS, {"user_id": user_id})
+        return res.rowcount
 
+    async def get_token_epoch(
+        self,
+        user_id: int,
+    ) -> int | None:
+        """Return the user's current token epoch, or None if the user does not exist."""
+        res = await self.session.execute(select(User.token_epoch).where(User.id == user_id))
+        return res.scalar_one_or_none()
+
+    async def get_token_epochs(
+        self,
+        user_ids: list[int],
+    ) -> dict[int, int]:
+        """Return the current token epoch of each of `user_ids` that still exists."""
+        ids = bindparam("ids", user_ids, type_=ARRAY(BigInteger()))
+        res = await self.session.execute(select(User.id, User.token_epoch).where(User.id == any_(ids)))
+        return {user_id: token_epoch for user_id, token_epoch in res.all()}
+
+    async def bump_token_epoch(
+        self,
+        user_id: int,
+    ) -> int | None:
+        """Revoke every token issued to the user so far; returns the new epoch."""
+        res = await self.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_epoch=User.token_epoch + 1)
+            .returning(User.token_epoch)
+        )
+        return res.scalar_one_or_none()
@@ -0,0 +1,58 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.cache_version_repo import CacheVersionRepository
+
+
+T = TypeVar("T")
+
+
+class VersionedCache(Generic[T]):
+    """Process-local read-through snapshot keyed by a row in ``cache_versions``.
+
+    The stored version is re-read at most once per ``check_interval_seconds``;
+    the loader only runs when that version differs from the cached one.
+    Concurrent reloads are harmless since the loader is a pure read.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        loader: Callable[[AsyncSession, int], Awaitable[T]],
+        check_interval_seconds: float,
+    ) -> None:
+        self.key = key
+        self._loader = loader
+        self._check_interval_seconds = check_interval_seconds
+        self._value: T | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0
+
+    @property
+    def version(
+        self,
+    ) -> int | None:
+        return self._version
+
+    async def get(
+        self,
+        session: AsyncSession,
+    ) -> T:
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self._check_interval_seconds:
+            return self._value
+        version = await CacheVersionRepository(session=session).get(key=self.key)
+        if self._value is None or version != self._version:
+            self._value = await self._loader(session, version)
+            self._version = version
+        self._checked_at = now
+        return self._value
+
+    def invalidate(
+        self,
+    ) -> None:
+        """Force a version check on the next read."""
+        self._checked_at = 0.0
@@ -1,11 +1,13 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ChallengeCreate(BaseModel):
     title: str
     short_description: str | None = None
+    title_rus: str | None = None
+    short_description_rus: str | None = None
     category: str | None = None
     tags: str | None = None
     size: str = "small"
@@ -17,6 +19,8 @@ class ChallengeRead(BaseModel):
     id: int
     title: str
     short_description: str | None
+    title_rus: str | None = None
+    short_description_rus: str | None = None
     category: str | None
     tags: str | None
     size: str
@@ -29,3 +33,10 @@ class ChallengeRead(BaseModel):
         from_attributes = True
 
 
+class ChallengeBatchRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+
+
+class ChallengeBatchRead(BaseModel):
+    items: list[ChallengeRead]
+    missing: list[int]
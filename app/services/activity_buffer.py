@@ -0,0 +1,162 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging import get_logger
+from app.repositories.user_activity_repo import ActivityRow, UserActivityRepository
+
+
+@dataclass(slots=True)
+class ActivityBufferStats:
+    queued: int = 0
+    flushed: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    failed: int = 0
+    flushes: int = 0
+    last_flush_ms: float = 0.0
+
+
+class ActivityWriteBuffer:
+    """Write-behind queue for activity events.
+
+    Requests enqueue `(user_id, activity_type, challenge_id)` rows and return.
+    A background task drains the queue whenever `batch_size` rows are waiting
+    or `flush_interval_seconds` has passed, writing each batch with one INSERT
+    in its own transaction; a batch that fails is split and retried, so only
+    the offending rows are lost. The queue is bounded: when it is full, `offer`
+    refuses the row and the caller writes it synchronously instead, which
+    slows clients down to what the database can absorb.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        max_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+    ) -> None:
+        self._sessionmaker = sessionmaker
+        self._queue: asyncio.Queue[ActivityRow] = asyncio.Queue(maxsize=max_size)
+        self._batch_size = batch_size
+        self._flush_interval_seconds = flush_interval_seconds
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: asyncio.Future[None] | None = None
+        self._pending: list[ActivityRow] = []
+        self._stats = ActivityBufferStats()
+        self._logger = get_logger("activity_buffer")
+
+    def start(
+        self,
+    ) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(
+        self,
+    ) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+        batch, self._pending = self._pending, []
+        await self._flush(self._drain(batch))
+        while not self._queue.empty():
+            await self._flush(self._drain([]))
+
+    def offer(
+        self,
+        user_id: int,
+        activity_type: str,
+        challenge_id: int,
+    ) -> bool:
+        """Queue one row; False means the buffer is full and nothing was queued."""
+        try:
+            self._queue.put_nowait((user_id, activity_type, challenge_id))
+        except asyncio.QueueFull:
+            self._stats.rejected += 1
+            return False
+        self._stats.queued += 1
+        return True
+
+    def stats(
+        self,
+    ) -> dict[str, float | int]:
+        return {
+            **asdict(self._stats),
+            "depth": self._queue.qsize(),
+            "max_size": self._queue.maxsize,
+        }
+
+    def _drain(
+        self,
+        batch: list[ActivityRow],
+    ) -> list[ActivityRow]:
+        while len(batch) < self._batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(
+        self,
+    ) -> None:
+        while True:
+            # Rows taken off the queue live in `_pending` so `close` can still write them
+            self._pending = [await self._queue.get()]
+            deadline = time.monotonic() + self._flush_interval_seconds
+            while len(self._drain(self._pending)) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._pending = self._pending, []
+            # Shielded so that cancelling the flusher never abandons a half-written batch
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _flush(
+        self,
+        batch: list[ActivityRow],
+    ) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        failed_before = self._stats.failed
+        stored = await self._write(batch)
+        self._stats.flushes += 1
+        self._stats.flushed += stored
+        self._stats.duplicates += len(batch) - stored - (self._stats.failed - failed_before)
+        self._stats.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _write(
+        self,
+        batch: list[ActivityRow],
+    ) -> int:
+        """Insert `batch`; if that fails, retry each half so one bad row loses only itself.
+
+        Returns the number of rows stored.
+        """
+        try:
+            async with self._sessionmaker() as session:
+                stored = await UserActivityRepository(session).insert_rows(batch)
+                await session.commit()
+            return stored
+        except Exception:
+            if len(batch) == 1:
+                self._stats.failed += 1
+                self._logger.exception("activity_flush_failed", row=batch[0])
+                return 0
+        middle = len(batch) // 2
+        return await self._write(batch[:middle]) + await self._write(batch[middle:])
@@ -5,7 +5,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import create_access_token
 from app.models.user import User
 from app.repositories.auth_code_repo import AuthCodeRepository
+from app.repositories.user_daily_stats_repo import utc_today
 from app.repositories.user_repo import UserRepository
+from app.services.daily_quota import DailyQuota
+
+
+DAILY_AUTH_CODES = 1
+
+
+async def _count_auth_codes(
+    session: AsyncSession,
+    user_id: int,
+    day: date,
+) -> int:
+    return await AuthCodeRepository(session=session).count_requests_today(user_id=user_id, d=day)
+
+
+AUTH_CODES_QUOTA = DailyQuota(name="auth_codes", limit=DAILY_AUTH_CODES, counter=_count_auth_codes)
 
 
 class AuthService:
@@ -22,16 +38,20 @@ class AuthService:
         email: str,
     ) -> None:
         user = await self.user_repo.create_if_not_exists(email=email)
-        today = date.today()
-        if await self.auth_repo.count_requests_today(user_id=user.id, d=today) >= 1:
+        today = utc_today()
+        if not await AUTH_CODES_QUOTA.consume(self.session, user.id, today):
             raise ValueError("rate_limited")
-        await self.auth_repo.delete_for_user(user_id=user.id)
-        await self.auth_repo.create(
-            user_id=user.id,
-            code=user.email.split("@")[0],
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
-        )
-        await self.session.commit()
+        try:
+            await self.auth_repo.delete_for_user(user_id=user.id)
+            await self.auth_repo.create(
+                user_id=user.id,
+                code=user.email.split("@")[0],
+                expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            )
+            await self.session.commit()
+        except Exception:
+            await AUTH_CODES_QUOTA.refund(user.id, today)
+            raise
 
     async def verify_code(
         self,
@@ -43,7 +63,7 @@ class AuthService:
         auth = await self.auth_repo.get_valid(user_id=user.id, code=code, now=now)
         if not auth:
             raise ValueError("invalid_code")
-        token = create_access_token(subject=str(user.id))
+        token = create_access_token(subject=str(user.id), token_epoch=user.token_epoch)
         return token
 
 
@@ -1,8 +1,7 @@
-from datetime import date
-
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories.challenge_completion_repo import ChallengeCompletionRepository
+from app.repositories.challenge_completion_repo import ChallengeCompletionRepository, CompletionResult
+from app.repositories.user_cache import get_user_cache
 
 
 FREE_DAILY_CHALLENGES = 1
@@ -20,13 +19,17 @@ class ChallengeCompletionService:
         self,
         user_id: int,
         challenge_id: int,
-        today: date,
-    ):
-        count_today = await self.repo.count_for_day(user_id=user_id, d=today)
-        if count_today >= FREE_DAILY_CHALLENGES:
-            raise ValueError("daily_limit_exceeded")
-        obj = await self.repo.create(user_id=user_id, challenge_id=challenge_id)
-        await self.session.commit()
-        return obj
-
-
+    ) -> CompletionResult:
+        """Record a completion in one round trip; `status` says whether and why not."""
+        result = await self.repo.create_within_limit(
+            user_id=user_id,
+            challenge_id=challenge_id,
+            daily_limit=FREE_DAILY_CHALLENGES,
+        )
+        if result.status == "created":
+            await self.session.commit()
+            # The completion moved the user's streak and total
+            get_user_cache().invalidate(user_id)
+        else:
+            await self.session.rollback()
+        return result
@@ -1,9 +1,20 @@
+from datetime import date
 from typing import Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.challenge import Challenge
+from app.core.pagination import Page
+from app.repositories.challenge_catalog import CatalogChallenge, ChallengeCatalog
 from app.repositories.challenge_repo import ChallengeRepository
+from app.repositories.challenge_sampler import filter_key, seeded_rng
+from app.repositories.seen_challenge_repo import SeenChallengeRepository
+from app.schemas.challenge import ChallengeRead
+
+
+def _encode(
+    item: CatalogChallenge,
+) -> bytes:
+    return ChallengeRead.model_validate(item).model_dump_json().encode("utf-8")
 
 
 class ChallengeService:
@@ -12,6 +23,41 @@ class ChallengeService:
         session: AsyncSession,
     ) -> None:
         self.repo = ChallengeRepository(session=session)
+        self.seen_repo = SeenChallengeRepository(session=session)
+
+    async def catalog_version(
+        self,
+    ) -> int:
+        catalog = await self.repo.catalog()
+        return catalog.version
+
+    async def encode(
+        self,
+        items: Sequence[CatalogChallenge],
+    ) -> Sequence[bytes]:
+        """Return the `ChallengeRead` JSON of each item, encoded once per catalog version."""
+        catalog = await self.repo.catalog()
+        return [self._payload(catalog, item) for item in items]
+
+    async def encode_list(
+        self,
+        items: Sequence[CatalogChallenge],
+    ) -> bytes:
+        """Return `items` as a JSON array assembled from cached fragments."""
+        return b"[" + b",".join(await self.encode(items)) + b"]"
+
+    @staticmethod
+    def _payload(
+        catalog: ChallengeCatalog,
+        item: CatalogChallenge,
+    ) -> bytes:
+        # Items from a catalog that was swapped out mid-request are encoded but not kept
+        if catalog.by_id.get(item.id) is not item:
+            return _encode(item)
+        payload = catalog.payloads.get(item.id)
+        if payload is None:
+            payload = catalog.payloads[item.id] = _encode(item)
+        return payload
 
     async def list(
         self,
@@ -21,7 +67,10 @@ class ChallengeService:
         size: str | None = None,
         q: str | None = None,
         free_only: bool = False,
-    ) -> Sequence[Challenge]:
+        cursor: str | None = None,
+        tags: Sequence[str] | None = None,
+        match_all_tags: bool = True,
+    ) -> Page[CatalogChallenge]:
         return await self.repo.list_all(
             limit=limit,
             offset=offset,
@@ -29,26 +78,78 @@ class ChallengeService:
             size=size,
             q=q,
             free_only=free_only,
+            cursor=cursor,
+            tags=tags,
+            match_all_tags=match_all_tags,
         )
 
     async def get(
         self,
         challenge_id: int,
-    ) -> Challenge | None:
+    ) -> CatalogChallenge | None:
         return await self.repo.get_by_id(challenge_id=challenge_id)
 
+    async def get_many(
+        self,
+        challenge_ids: Sequence[int],
+    ) -> tuple[Sequence[CatalogChallenge], Sequence[int]]:
+        return await self.repo.get_many(challenge_ids=challenge_ids)
+
     async def get_random(
         self,
         limit: int = 5,
         category: str | None = None,
         size: str | None = None,
         free_only: bool = False,
-    ) -> Sequence[Challenge]:
+        tags: Sequence[str] | None = None,
+        match_all_tags: bool = True,
+        user_id: int | None = None,
+        exclude_seen: bool = False,
+    ) -> Sequence[CatalogChallenge]:
+        """Draw a random deck; with `exclude_seen`, cards `user_id` has viewed or swiped come last."""
+        exclude = None
+        if exclude_seen and user_id is not None:
+            exclude = await self.seen_repo.get_seen(user_id=user_id)
         return await self.repo.get_random(
             limit=limit,
             category=category,
             size=size,
             free_only=free_only,
+            tags=tags,
+            match_all_tags=match_all_tags,
+            exclude=exclude,
         )
 
+    async def get_daily(
+        self,
+        user_id: int,
+        day: date,
+        limit: int = 5,
+        category: str | None = None,
+        size: str | None = None,
+        free_only: bool = False,
+        tags: Sequence[str] | None = None,
+        match_all_tags: bool = True,
+    ) -> Sequence[CatalogChallenge]:
+        """Draw the deck of `user_id` for `day`.
 
+        The generator is seeded from the user, the day and the normalized
+        filters, so every node returns the same deck until the catalog
+        changes, without storing anything.
+        """
+        key = filter_key(
+            category=category,
+            size=size,
+            free_only=free_only,
+            tags=tags,
+            match_all=match_all_tags,
+        )
+        return await self.repo.get_random(
+            limit=limit,
+            category=category,
+            size=size,
+            free_only=free_only,
+            tags=tags,
+            match_all_tags=match_all_tags,
+            rng=seeded_rng("daily", user_id, day.isoformat(), key, limit),
+        )
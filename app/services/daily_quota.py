@@ -0,0 +1,167 @@
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, time, timedelta, timezone
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import get_async_redis
+from app.core.settings import get_settings
+
+
+# Counts today's usage from the database: (session, user_id, day) -> count
+DailyCounter = Callable[[AsyncSession, int, date], Awaitable[int]]
+
+# KEYS[1] counter; ARGV: limit (-1 for none), amount, expire-at, seed ("" if unknown).
+# Returns the new count, -1 when the limit would be exceeded, -2 when the
+# counter does not exist yet and has to be seeded from the database.
+_CONSUME = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    if ARGV[4] == '' then
+        return -2
+    end
+    current = ARGV[4]
+    redis.call('SET', KEYS[1], current)
+end
+local limit = tonumber(ARGV[1])
+local amount = tonumber(ARGV[2])
+if limit >= 0 and tonumber(current) + amount > limit then
+    redis.call('EXPIREAT', KEYS[1], ARGV[3])
+    return -1
+end
+local value = redis.call('INCRBY', KEYS[1], amount)
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return value
+"""
+
+# Only decrements a live counter, so a late refund cannot leave a negative key behind
+_REFUND = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('DECRBY', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+_NEEDS_SEED = -2
+_OVER_LIMIT = -1
+
+# Counters outlive the UTC day by a little so late requests still see them
+_EXPIRY_GRACE = timedelta(hours=1)
+
+
+class DailyQuota:
+    """Per-user daily usage counter with an optional limit.
+
+    The counter is a Redis key per (quota, user, day), updated by one Lua
+    script that checks the limit and increments atomically, so concurrent
+    requests cannot both take the last unit. A missing key is seeded once
+    from the database count, which keeps counts right after a Redis restart.
+    The key expires at the end of the UTC day that `user_daily_stats` uses.
+    Without Redis, every check falls back to counting in the database.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int | None,
+        counter: DailyCounter,
+        redis: Redis | None = None,
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self._counter = counter
+        self._redis = redis
+
+    def _client(
+        self,
+    ) -> Redis:
+        return self._redis or get_async_redis()
+
+    def _key(
+        self,
+        user_id: int,
+        day: date,
+    ) -> str:
+        return f"{get_settings().quota_prefix}{self.name}:{user_id}:{day.isoformat()}"
+
+    @staticmethod
+    def _expire_at(
+        day: date,
+    ) -> int:
+        end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        return int((end + _EXPIRY_GRACE).timestamp())
+
+    async def consume(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        day: date,
+        amount: int = 1,
+    ) -> bool:
+        """Take `amount` units of today's quota; False when that would exceed the limit.
+
+        Call `refund` if the action the units were taken for does not happen.
+        """
+        limit = -1 if self.limit is None else self.limit
+        key = self._key(user_id, day)
+        args: list[int | str] = [limit, amount, self._expire_at(day), ""]
+        try:
+            script = self._client().register_script(_CONSUME)
+            result = await script(keys=[key], args=args)
+            if result == _NEEDS_SEED:
+                args[3] = await self._counter(session, user_id, day)
+                result = await script(keys=[key], args=args)
+        except (RedisError, OSError):
+            if self.limit is None:
+                return True
+            return await self._counter(session, user_id, day) + amount <= self.limit
+        return result != _OVER_LIMIT
+
+    async def refund(
+        self,
+        user_id: int,
+        day: date,
+        amount: int = 1,
+    ) -> None:
+        try:
+            await self._client().register_script(_REFUND)(keys=[self._key(user_id, day)], args=[amount])
+        except (RedisError, OSError):
+            # Without Redis the database count is authoritative anyway
+            return
+
+    async def used(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        day: date,
+    ) -> int:
+        """Return today's usage, from Redis when the counter exists."""
+        try:
+            value = await self._client().get(self._key(user_id, day))
+        except (RedisError, OSError):
+            value = None
+        if value is not None:
+            return int(value)
+        return await self._counter(session, user_id, day)
+
+
+async def clear_daily_quotas(
+    day: date,
+    redis: Redis | None = None,
+) -> int:
+    """Drop every quota counter of `day` so the next use reseeds it from the database.
+
+    Call after rows counted by a quota were deleted. Returns the number of
+    counters removed.
+    """
+    client = redis or get_async_redis()
+    pattern = f"{get_settings().quota_prefix}*:*:{day.isoformat()}"
+    try:
+        keys = [key async for key in client.scan_iter(match=pattern, count=1000)]
+        if not keys:
+            return 0
+        return await client.delete(*keys)
+    except (RedisError, OSError):
+        # Without Redis the database count is authoritative anyway
+        return 0
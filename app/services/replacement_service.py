@@ -3,12 +3,26 @@ from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.replacement_repo import ReplacementRepository
+from app.repositories.user_daily_stats_repo import UserDailyStatsRepository
 from app.repositories.user_repo import UserRepository
+from app.services.daily_quota import DailyQuota
 
 
 FREE_DAILY_REPLACEMENTS = 1
 
 
+async def _count_replacements(
+    session: AsyncSession,
+    user_id: int,
+    day: date,
+) -> int:
+    stats = await UserDailyStatsRepository(session=session).get(user_id=user_id, day=day)
+    return stats.replacements if stats else 0
+
+
+REPLACEMENTS_QUOTA = DailyQuota(name="replacements", limit=FREE_DAILY_REPLACEMENTS, counter=_count_replacements)
+
+
 class ReplacementService:
     def __init__(
         self,
@@ -25,11 +39,14 @@ class ReplacementService:
         to_item: str,
         today: date,
     ):
-        count_today = await self.repo.count_for_day(user_id=user_id, d=today)
-        if count_today >= FREE_DAILY_REPLACEMENTS:
+        if not await REPLACEMENTS_QUOTA.consume(self.session, user_id, today):
             raise ValueError("daily_limit_exceeded")
-        obj = await self.repo.create(user_id=user_id, from_item=from_item, to_item=to_item)
-        await self.session.commit()
+        try:
+            obj = await self.repo.create(user_id=user_id, from_item=from_item, to_item=to_item)
+            await self.session.commit()
+        except Exception:
+            await REPLACEMENTS_QUOTA.refund(user_id, today)
+            raise
         return obj
 
 
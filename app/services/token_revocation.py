@@ -0,0 +1,219 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging import get_logger
+from app.core.settings import get_settings
+from app.repositories.user_repo import UserRepository
+
+
+# Pause before resubscribing after Redis went away
+_RETRY_SECONDS = 1.0
+
+
+class TokenRevocationCache:
+    """In-process copy of the token blacklist and of users' token epochs.
+
+    The database (`users.token_epoch`) and Redis (blacklist) stay the source
+    of truth. Every revocation is also published on `jwt_revocation_channel`;
+    each process subscribes and applies it to its local copy within
+    milliseconds. In case a message was lost, the blacklist is rebuilt from
+    Redis and the cached epochs are refreshed from the database after every
+    (re)subscribe and every `jwt_revocation_reconcile_seconds`. Revocations
+    are rare, so the copy holds the ids themselves (exact, unlike a bloom
+    filter).
+
+    Epochs are loaded from the database on first use and kept for the
+    `jwt_epoch_cache_size` most recently seen users; an epoch only ever goes
+    up, so a cached value is only ever raised and a token is valid while its
+    `token_epoch` claim is not below it.
+
+    `ready` is False until the first rebuild and while the subscription is
+    down; callers must then ask Redis and the database instead.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        sessionmaker: async_sessionmaker[AsyncSession],
+    ) -> None:
+        settings = get_settings()
+        self._redis = redis
+        self._sessionmaker = sessionmaker
+        self._channel = settings.jwt_revocation_channel
+        self._blacklist_prefix = settings.jwt_blacklist_prefix
+        self._reconcile_seconds = settings.jwt_revocation_reconcile_seconds
+        self._epoch_cache_size = settings.jwt_epoch_cache_size
+        # jti -> unix time the entry can be forgotten
+        self._revoked: dict[str, int] = {}
+        # user_id -> current token epoch, least recently used first
+        self._epochs: OrderedDict[int, int] = OrderedDict()
+        self._ready = False
+        self._task: asyncio.Task[None] | None = None
+        self._logger = get_logger("token_revocation")
+
+    @property
+    def ready(
+        self,
+    ) -> bool:
+        return self._ready
+
+    def start(
+        self,
+    ) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(
+        self,
+    ) -> None:
+        self._ready = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_revoked(
+        self,
+        jti: str,
+    ) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > int(time.time())
+
+    def add(
+        self,
+        jti: str,
+        expires_at: int,
+    ) -> None:
+        """Record a revocation made by this process without waiting for its broadcast."""
+        self._revoked[jti] = expires_at
+
+    def token_epoch(
+        self,
+        user_id: int,
+    ) -> int | None:
+        """Return the cached epoch of `user_id`, or None if it has to be loaded."""
+        epoch = self._epochs.get(user_id)
+        if epoch is not None:
+            self._epochs.move_to_end(user_id)
+        return epoch
+
+    def set_token_epoch(
+        self,
+        user_id: int,
+        token_epoch: int,
+    ) -> None:
+        """Cache the epoch of `user_id`; a lower value than the cached one is ignored."""
+        current = self._epochs.get(user_id)
+        self._epochs[user_id] = token_epoch if current is None else max(current, token_epoch)
+        self._epochs.move_to_end(user_id)
+        while len(self._epochs) > self._epoch_cache_size:
+            self._epochs.popitem(last=False)
+
+    def apply(
+        self,
+        message: str | bytes,
+    ) -> None:
+        """Apply one published revocation (see `app.core.security`)."""
+        data = json.loads(message)
+        if "jti" in data:
+            self.add(str(data["jti"]), int(data["exp"]))
+        elif "user_id" in data:
+            self.set_token_epoch(int(data["user_id"]), int(data["token_epoch"]))
+
+    async def reconcile(
+        self,
+    ) -> None:
+        """Replace the local blacklist with what Redis holds now and refresh cached epochs.
+
+        The cached users' epochs are read back from the database in one query
+        and merged like `set_token_epoch`, so a bump whose broadcast was lost
+        applies within one period. If the database is unreachable the cached
+        epochs are kept and refreshed on the next reconcile.
+
+        Raises
+        ------
+        RedisError
+            If Redis is unreachable.
+        """
+        now = int(time.time())
+        # Keys written without an expiry value are kept until the next rebuild
+        fallback = now + 2 * int(self._reconcile_seconds) + 1
+        revoked: dict[str, int] = {}
+        for key, value in await self._scan(self._blacklist_prefix):
+            expires_at = int(value)
+            revoked[key[len(self._blacklist_prefix):]] = expires_at if expires_at > now else fallback
+        self._revoked = revoked
+        await self._refresh_epochs()
+
+    async def _refresh_epochs(
+        self,
+    ) -> None:
+        user_ids = list(self._epochs)
+        if not user_ids:
+            return
+        try:
+            async with self._sessionmaker() as session:
+                current = await UserRepository(session=session).get_token_epochs(user_ids=user_ids)
+        except (SQLAlchemyError, OSError) as exc:
+            self._logger.warning("token_epoch_refresh_failed", error=str(exc))
+            return
+        # Entries keep their place in the LRU order; ones evicted or raised
+        # meanwhile are left alone, and deleted users are forgotten
+        for user_id in user_ids:
+            cached = self._epochs.get(user_id)
+            if cached is None:
+                continue
+            epoch = current.get(user_id)
+            if epoch is None:
+                del self._epochs[user_id]
+            else:
+                self._epochs[user_id] = max(cached, epoch)
+
+    async def _scan(
+        self,
+        prefix: str,
+    ) -> list[tuple[str, str]]:
+        keys = [key.decode() async for key in self._redis.scan_iter(match=f"{prefix}*", count=1000)]
+        if not keys:
+            return []
+        values = await self._redis.mget(keys)
+        # A key can expire between SCAN and MGET
+        return [(key, value.decode()) for key, value in zip(keys, values) if value is not None]
+
+    async def _run(
+        self,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    # Subscribed first, so nothing published during the rebuild is missed
+                    await self.reconcile()
+                    self._ready = True
+                    next_reconcile = loop.time() + self._reconcile_seconds
+                    while True:
+                        timeout = max(0.0, min(1.0, next_reconcile - loop.time()))
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                        if message is not None:
+                            try:
+                                self.apply(message["data"])
+                            except (ValueError, KeyError, TypeError):
+                                self._logger.warning("revocation_message_invalid", data=message["data"])
+                        if loop.time() >= next_reconcile:
+                            await self.reconcile()
+                            next_reconcile = loop.time() + self._reconcile_seconds
+            except (RedisError, OSError) as exc:
+                self._ready = False
+                self._logger.warning("revocation_subscription_lost", error=str(exc))
+                await asyncio.sleep(_RETRY_SECONDS)
@@ -1,40 +1,113 @@
 from datetime import date
-from typing import List
+from typing import List, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.repositories.seen_challenge_repo import SEEN_ACTIVITY_TYPES, SeenChallengeRepository
+from app.repositories.user_daily_stats_repo import UserDailyStatsRepository, utc_today
 from app.repositories.user_activity_repo import UserActivityRepository, UserFavoriteRepository
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.services.daily_quota import DailyQuota
+
+
+async def _count_swipes(
+    session: AsyncSession,
+    user_id: int,
+    day: date,
+) -> int:
+    stats = await UserDailyStatsRepository(session).get(user_id, day)
+    return stats.swipes if stats else 0
+
+
+# Swipes are not limited, but their daily count is served from the same counters
+SWIPES_QUOTA = DailyQuota(name="swipes", limit=None, counter=_count_swipes)
 
 
 class UserActivityService:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: AsyncSession, buffer: ActivityWriteBuffer | None = None) -> None:
         self.session = session
+        self.buffer = buffer
         self.activity_repo = UserActivityRepository(session)
         self.favorite_repo = UserFavoriteRepository(session)
+        self.seen_repo = SeenChallengeRepository(session)
 
     async def track_swipe(self, user_id: int, challenge_id: int, direction: str) -> None:
         """Track a swipe action (left or right)"""
         activity_type = f"swipe_{direction}"
-        await self.activity_repo.create_activity(user_id, activity_type, challenge_id)
-        await self.session.commit()
+        # Counted before the write so a freshly seeded counter does not include this swipe twice
+        today = utc_today()
+        await SWIPES_QUOTA.consume(self.session, user_id, today)
+        try:
+            if await self._enqueue(user_id, activity_type, challenge_id):
+                return
+            await self.activity_repo.create_activity(user_id, activity_type, challenge_id)
+            await self.session.commit()
+        except Exception:
+            await SWIPES_QUOTA.refund(user_id, today)
+            raise
+        await self.seen_repo.mark_seen(user_id, challenge_id)
 
     async def track_view(self, user_id: int, challenge_id: int) -> None:
         """Track when user views a challenge"""
-        # Only track if not already viewed
-        if not await self.activity_repo.is_challenge_viewed(user_id, challenge_id):
-            await self.activity_repo.create_activity(user_id, "view", challenge_id)
+        # Buffered views are deduplicated when the buffer flushes
+        if await self._enqueue(user_id, "view", challenge_id):
+            return
+        # Repeated views are ignored by the unique index
+        if await self.activity_repo.create_once(user_id, "view", challenge_id):
             await self.session.commit()
+            await self.seen_repo.mark_seen(user_id, challenge_id)
 
     async def track_selection(self, user_id: int, challenge_id: int) -> None:
         """Track when user selects a challenge"""
-        # Only track if not already selected
-        if not await self.activity_repo.is_challenge_selected(user_id, challenge_id):
-            await self.activity_repo.create_activity(user_id, "select", challenge_id)
+        if await self._enqueue(user_id, "select", challenge_id):
+            return
+        # Repeated selections are ignored by the unique index
+        if await self.activity_repo.create_once(user_id, "select", challenge_id):
             await self.session.commit()
 
+    async def track_batch(self, user_id: int, events: Sequence[tuple[str, int]]) -> int:
+        """Record `(activity_type, challenge_id)` events in one INSERT and one commit.
+
+        Views and selections already recorded, or repeated within the batch,
+        are dropped. Returns the number of events stored; events handed to
+        the write-behind buffer count as stored.
+        """
+        today = utc_today()
+        swipes = sum(activity_type.startswith("swipe_") for activity_type, _ in events)
+        if swipes:
+            await SWIPES_QUOTA.consume(self.session, user_id, today, amount=swipes)
+        pending = events
+        if self.buffer is not None:
+            buffer = self.buffer
+            pending = [event for event in events if not buffer.offer(user_id, *event)]
+        stored = len(events) - len(pending)
+        if pending:
+            try:
+                stored += await self.activity_repo.insert_rows(
+                    [(user_id, activity_type, challenge_id) for activity_type, challenge_id in pending]
+                )
+                await self.session.commit()
+            except Exception:
+                unwritten = sum(activity_type.startswith("swipe_") for activity_type, _ in pending)
+                if unwritten:
+                    await SWIPES_QUOTA.refund(user_id, today, amount=unwritten)
+                raise
+        seen = [challenge_id for activity_type, challenge_id in events if activity_type in SEEN_ACTIVITY_TYPES]
+        if seen:
+            await self.seen_repo.mark_seen_many(user_id, seen)
+        return stored
+
+    async def _enqueue(self, user_id: int, activity_type: str, challenge_id: int) -> bool:
+        """Hand one event to the write-behind buffer; False means write it now."""
+        if self.buffer is None or not self.buffer.offer(user_id, activity_type, challenge_id):
+            return False
+        if activity_type in SEEN_ACTIVITY_TYPES:
+            await self.seen_repo.mark_seen(user_id, challenge_id)
+        return True
+
     async def get_swipes_today(self, user_id: int, today: date) -> int:
         """Get number of swipes used today"""
-        return await self.activity_repo.count_swipes_today(user_id, today)
+        return await SWIPES_QUOTA.used(self.session, user_id, today)
 
     async def get_viewed_challenges(self, user_id: int) -> List[int]:
         """Get list of viewed challenge IDs"""
@@ -10,6 +10,9 @@ from app.core.settings import get_settings
 from app.db.session import build_engine_and_sessionmaker
 from app.models.challenge import Challenge
 from app.models.meta import Category, Size, Tag
+from app.repositories.challenge_catalog import bump_catalog_version
+from app.repositories.challenge_tag_repo import ChallengeTagRepository
+from app.repositories.meta_catalog import bump_meta_version
 
 
 def _get_cards_path(
@@ -90,6 +93,7 @@ async def _upsert_meta(
                 index_elements=["name"]
             )
         )
+    await bump_meta_version(session=session)
     await session.commit()
 
 
@@ -99,6 +103,8 @@ def _card_to_challenge_values(
     return {
         "title": str(card.get("title") or "").strip(),
         "short_description": (str(card.get("short_description")).strip() if card.get("short_description") else None),
+        "title_rus": (str(card.get("title_rus")).strip() if card.get("title_rus") else None),
+        "short_description_rus": (str(card.get("short_description_rus")).strip() if card.get("short_description_rus") else None),
         "category": (str(card.get("category")).strip() if card.get("category") else None),
         "tags": (str(card.get("tags")).strip() if card.get("tags") else None),
         "size": (str(card.get("size")).strip() if card.get("size") else "small"),
@@ -115,13 +121,19 @@ async def _insert_challenges(
         values = _card_to_challenge_values(card=card)
         if not values["title"]:
             continue
+        stmt = insert(Challenge).values(values)
+        # Challenges imported before the Russian fields existed get them filled in
         await session.execute(
-            insert(Challenge).values(
-                values
-            ).on_conflict_do_nothing(
-                index_elements=["title"]
+            stmt.on_conflict_do_update(
+                index_elements=["title"],
+                set_={
+                    "title_rus": stmt.excluded.title_rus,
+                    "short_description_rus": stmt.excluded.short_description_rus,
+                },
             )
         )
+    await ChallengeTagRepository(session=session).sync_from_challenges()
+    await bump_catalog_version(session=session)
     await session.commit()
 
 
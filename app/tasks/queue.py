@@ -1,13 +1,31 @@
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
 from rq import Queue
 
 from app.core.settings import get_settings
 
 
+_pool: BlockingConnectionPool | None = None
+
+
+def _connection_pool() -> BlockingConnectionPool:
+    """One blocking pool per process, shared by every RQ connection.
+
+    A caller waits up to `redis_pool_timeout_seconds` for a free connection.
+    """
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = BlockingConnectionPool.from_url(
+            url=settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+        )
+    return _pool
+
+
 def get_redis_connection() -> Redis:
-    settings = get_settings()
-    return Redis.from_url(
-        url=settings.redis_url,
+    return Redis(
+        connection_pool=_connection_pool(),
     )
 
 
@@ -20,5 +38,3 @@ def get_queue(
         name=queue_name,
         connection=get_redis_connection(),
     )
-
-
@@ -5,6 +5,9 @@ from sqlalchemy.dialects.postgresql import insert
 from app.core.settings import get_settings
 from app.db.session import build_engine_and_sessionmaker
 from app.models.challenge import Challenge
+from app.repositories.challenge_catalog import bump_catalog_version
+from app.repositories.challenge_tag_repo import ChallengeTagRepository
+from app.repositories.meta_catalog import bump_meta_version
 
 
 async def seed() -> None:
@@ -132,8 +135,14 @@ async def seed() -> None:
         ]
         # Insert challenges one by one to handle nullable fields properly
         for challenge_data in values:
-            stmt = insert(Challenge).values(challenge_data)
+            stmt = insert(Challenge).values(challenge_data).on_conflict_do_nothing(
+                index_elements=["title"]
+            )
             await session.execute(stmt)
+        # Tags missing from the meta table are added while linking
+        await ChallengeTagRepository(session=session).sync_from_challenges()
+        await bump_catalog_version(session=session)
+        await bump_meta_version(session=session)
         await session.commit()
 
 
@@ -5,6 +5,7 @@ from sqlalchemy.dialects.postgresql import insert
 from app.core.settings import get_settings
 from app.db.session import build_engine_and_sessionmaker
 from app.models.meta import Category, Size, Tag
+from app.repositories.meta_catalog import bump_meta_version
 
 
 async def seed() -> None:
@@ -45,6 +46,7 @@ async def seed() -> None:
         await session.execute(insert(Category).values([{"name": n} for n in cats]).on_conflict_do_nothing(index_elements=["name"]))
         await session.execute(insert(Size).values([{"name": n} for n in sizes]).on_conflict_do_nothing(index_elements=["name"]))
         await session.execute(insert(Tag).values([{"name": n} for n in tags]).on_conflict_do_nothing(index_elements=["name"]))
+        await bump_meta_version(session=session)
         await session.commit()
 
 
@@ -0,0 +1,210 @@
+import asyncio
+import httpx
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import func, select, text, update
+from app.main import create_app
+from app.models.challenge import Challenge
+from app.models.user import User
+from app.models.user_activity import UserActivity
+from app.repositories.activity_partition_repo import ActivityPartitionRepository
+from app.services.activity_buffer import ActivityWriteBuffer
+from app.tasks.maintain_activity_partitions import maintain
+from app.tasks.seed_challenges import seed as seed_challenges
+
+
+async def test_activity_batch_deduplicates_views_and_selections() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"batch-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        first, second = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 2})).json()]
+
+        events = [
+            {"type": "view", "challenge_id": first},
+            {"type": "swipe", "challenge_id": first, "direction": "right"},
+            {"type": "view", "challenge_id": first},
+            {"type": "select", "challenge_id": first},
+            {"type": "swipe", "challenge_id": second, "direction": "left"},
+            {"type": "view", "challenge_id": 10**12},
+        ]
+        resp = await client.post("/api/activity/batch", json={"events": events}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.json() == {"stored": 4, "duplicates": 1, "unknown": [10**12]}
+
+        repeat = await client.post("/api/activity/batch", json={"events": events[:4]}, headers=headers)
+        assert repeat.json() == {"stored": 1, "duplicates": 3, "unknown": []}
+        assert (await client.get("/api/activity/viewed", headers=headers)).json() == {"viewed": [first]}
+        assert (await client.get("/api/activity/swipes/today", headers=headers)).json() == {"swipes_today": 3}
+
+        bad = await client.post("/api/activity/batch", json={"events": [{"type": "swipe", "challenge_id": first}]}, headers=headers)
+        assert bad.status_code == 422
+
+
+async def test_write_behind_buffer_flushes_on_close() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"buffer-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        ids = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 3})).json()]
+
+        buffer = ActivityWriteBuffer(
+            sessionmaker=app.state.db_sessionmaker,
+            max_size=3,
+            batch_size=100,
+            flush_interval_seconds=60.0,
+        )
+        app.state.activity_buffer = buffer
+        for challenge_id in [ids[0], ids[0], ids[1], ids[2]]:
+            await client.post("/api/activity/view", json={"challenge_id": challenge_id}, headers=headers)
+        stats = (await client.get("/api/admin/activity-buffer")).json()
+        # The fourth view found the queue full and was written inline
+        assert stats["enabled"] is True
+        assert (stats["queued"], stats["depth"], stats["rejected"]) == (3, 3, 1)
+        assert (await client.get("/api/activity/viewed", headers=headers)).json() == {"viewed": [ids[2]]}
+
+        buffer.start()
+        await buffer.close()
+        assert buffer.stats()["depth"] == 0
+        assert buffer.stats()["flushed"] == 2 and buffer.stats()["duplicates"] == 1
+        viewed = (await client.get("/api/activity/viewed", headers=headers)).json()["viewed"]
+        assert sorted(viewed) == sorted(ids)
+
+
+async def test_buffer_flush_loses_only_the_bad_rows() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"split-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        ids = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 3})).json()]
+        # Unknown challenges are refused before anything is queued
+        unknown = await client.post("/api/activity/view", json={"challenge_id": 10**12}, headers=headers)
+        assert unknown.status_code == 404
+
+        async with app.state.db_sessionmaker() as session:
+            user_id = await session.scalar(select(User.id).where(User.email == email))
+        buffer = ActivityWriteBuffer(
+            sessionmaker=app.state.db_sessionmaker,
+            max_size=10,
+            batch_size=100,
+            flush_interval_seconds=60.0,
+        )
+        # A row for a user that does not exist fails its INSERT; a deleted challenge is skipped
+        for row in [(user_id, "view", ids[0]), (10**12, "view", ids[1]), (user_id, "view", 10**12), (user_id, "view", ids[2])]:
+            assert buffer.offer(*row)
+        await buffer.close()
+        stats = buffer.stats()
+        assert (stats["flushed"], stats["failed"], stats["duplicates"]) == (2, 1, 1)
+        viewed = (await client.get("/api/activity/viewed", headers=headers)).json()["viewed"]
+        assert sorted(viewed) == sorted([ids[0], ids[2]])
+
+
+async def test_repeated_views_are_stored_once_under_concurrency() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"once-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        challenge_id = (await client.get("/api/challenges/", params={"limit": 1})).json()[0]["id"]
+        responses = await asyncio.gather(
+            *[client.post("/api/activity/view", json={"challenge_id": challenge_id}, headers=headers) for _ in range(5)],
+            *[client.post("/api/activity/select", json={"challenge_id": challenge_id}, headers=headers) for _ in range(5)],
+        )
+        assert all(resp.status_code == 200 for resp in responses)
+        assert (await client.get("/api/activity/viewed", headers=headers)).json() == {"viewed": [challenge_id]}
+        async with app.state.db_sessionmaker() as session:
+            user_id = select(User.id).where(User.email == email).scalar_subquery()
+            count = await session.scalar(
+                select(func.count())
+                .select_from(UserActivity)
+                .where(UserActivity.user_id == user_id, UserActivity.challenge_id == challenge_id)
+            )
+        assert count == 2
+
+        # A view from an earlier month still counts as the one view
+        async with app.state.db_sessionmaker() as session:
+            await session.execute(
+                update(UserActivity)
+                .where(UserActivity.user_id == user_id, UserActivity.challenge_id == challenge_id)
+                .values(created_at=func.now() - timedelta(days=40))
+            )
+            await session.commit()
+        assert (await client.post("/api/activity/view", json={"challenge_id": challenge_id}, headers=headers)).status_code == 200
+        async with app.state.db_sessionmaker() as session:
+            views = await session.scalar(
+                select(func.count())
+                .select_from(UserActivity)
+                .where(UserActivity.user_id == user_id, UserActivity.activity_type == "view")
+            )
+        assert views == 1
+
+
+async def test_partition_maintenance_creates_ahead_and_drops_expired() -> None:
+    app = create_app()
+    async with app.state.db_sessionmaker() as session:
+        created, dropped = await maintain(session=session, today=date(2090, 1, 15), months_ahead=1, retention_months=None)
+        assert (created, dropped) == ([date(2090, 1, 1), date(2090, 2, 1)], [])
+        assert (await maintain(session=session, today=date(2090, 1, 31), months_ahead=1, retention_months=None)) == ([], [])
+
+        created, dropped = await maintain(session=session, today=date(2090, 3, 1), months_ahead=0, retention_months=1)
+        assert created == [date(2090, 3, 1)]
+        assert dropped[-1] == date(2090, 1, 1) and date(2090, 2, 1) not in dropped
+        assert (await ActivityPartitionRepository(session=session).list_months()) == [date(2090, 2, 1), date(2090, 3, 1)]
+
+        # Rows past the last partition go to the default one and move when their month is created
+        user_id = await session.scalar(select(func.min(User.id)))
+        challenge_id = await session.scalar(select(func.min(Challenge.id)))
+        session.add(
+            UserActivity(
+                user_id=user_id,
+                activity_type="swipe_left",
+                challenge_id=challenge_id,
+                created_at=datetime(2090, 7, 4, tzinfo=timezone.utc),
+            )
+        )
+        await session.flush()
+        assert await ActivityPartitionRepository(session=session).create(date(2090, 7, 1)) == 1
+        in_july = await session.scalar(select(func.count()).select_from(text("user_activities_y2090m07")))
+        assert in_july == 1
+        # Partition DDL is transactional; leave the real partitions in place
+        await session.rollback()
+
+
+async def test_admin_reset_clears_cached_quota_counters() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"reset-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        first, second = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 2})).json()]
+        for challenge_id in (first, second):
+            swipe = {"challenge_id": challenge_id, "direction": "left"}
+            assert (await client.post("/api/activity/swipe", json=swipe, headers=headers)).status_code in (200, 201)
+        assert (await client.get("/api/activity/swipes/today", headers=headers)).json() == {"swipes_today": 2}
+
+        assert (await client.post("/api/activity/view", json={"challenge_id": first}, headers=headers)).status_code == 200
+
+        assert (await client.post("/api/admin/reset-today")).status_code == 200
+        assert (await client.get("/api/activity/swipes/today", headers=headers)).json() == {"swipes_today": 0}
+        assert (await client.get("/api/activity/viewed", headers=headers)).json() == {"viewed": []}
+        # A view made before the reset does not block tracking it again
+        assert (await client.post("/api/activity/view", json={"challenge_id": first}, headers=headers)).status_code == 200
+        assert (await client.get("/api/activity/viewed", headers=headers)).json() == {"viewed": [first]}
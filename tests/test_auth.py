@@ -1,6 +1,20 @@
+import asyncio
+import json
+import time
 import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
 from uuid import uuid4
+from redis.exceptions import RedisError
+from sqlalchemy import update
+from app.core.redis import create_async_redis, get_async_redis
+from app.core.security import revocation_key
+from app.core.settings import get_settings
+from app.integrations.jwks import IdentityProviders
 from app.main import create_app
+from app.models.user import User
 
 
 async def test_auth_flow() -> None:
@@ -32,3 +46,179 @@ async def test_request_code_rate_limit() -> None:
         assert r2.status_code == 429
 
 
+
+
+async def test_lifespan_shares_one_redis_pool_for_auth() -> None:
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        redis = app.state.redis
+        assert get_async_redis() is redis
+        try:
+            await redis.ping()
+        except (RedisError, OSError):
+            pytest.skip("token revocation needs Redis")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            email = f"pool-{uuid4().hex[:8]}@example.com"
+            assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+            token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            assert (await client.get("/api/users/me-auth", headers=headers)).status_code == 200
+            assert (await client.post("/api/auth/logout", headers=headers)).status_code == 204
+            assert (await client.get("/api/users/me-auth", headers=headers)).status_code == 401
+            jti = jwt.decode(token, options={"verify_signature": False})["jti"]
+            await redis.delete(revocation_key(jti))
+    assert app.state.redis is None and get_async_redis() is not redis
+
+
+async def test_busy_redis_pool_waits_for_a_connection(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "redis_max_connections", 1)
+    redis = create_async_redis()
+    try:
+        try:
+            await redis.ping()
+        except (RedisError, OSError):
+            pytest.skip("needs Redis")
+        # Both commands share the single connection instead of the second failing
+        assert await asyncio.gather(redis.ping(), redis.ping(), redis.ping()) == [True, True, True]
+    finally:
+        await redis.aclose()
+
+
+async def _wait_until(
+    predicate,
+    timeout: float = 2.0,
+) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def test_logout_reaches_other_processes_through_pubsub() -> None:
+    first, second = create_app(), create_app()
+    async with first.router.lifespan_context(first), second.router.lifespan_context(second):
+        try:
+            await first.state.redis.ping()
+        except (RedisError, OSError):
+            pytest.skip("revocation broadcasts need Redis")
+        remote = second.state.revocations
+        assert await _wait_until(lambda: first.state.revocations.ready and remote.ready)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=first), base_url="http://test") as client:
+            email = f"pubsub-{uuid4().hex[:8]}@example.com"
+            verify = {"email": email, "code": email.split("@")[0]}
+            assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+            token = (await client.post("/api/auth/verify", json=verify)).json()["access_token"]
+            spare = (await client.post("/api/auth/verify", json=verify)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        claims = jwt.decode(token, options={"verify_signature": False})
+        user_id, jti = int(claims["sub"]), claims["jti"]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=second), base_url="http://test") as other:
+            assert (await other.get("/api/users/me-auth", headers=headers)).status_code == 200
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=first), base_url="http://test") as client:
+                assert (await client.post("/api/auth/logout", headers=headers)).status_code == 204
+            assert await _wait_until(lambda: remote.is_revoked(jti=jti))
+            assert (await other.get("/api/users/me-auth", headers=headers)).status_code == 401
+
+            # An epoch bump whose broadcast was lost applies after the next reconcile
+            spare_headers = {"Authorization": f"Bearer {spare}"}
+            assert (await other.get("/api/users/me-auth", headers=spare_headers)).status_code == 200
+            assert remote.token_epoch(user_id) == 0
+            async with second.state.db_sessionmaker() as session:
+                await session.execute(update(User).where(User.id == user_id).values(token_epoch=User.token_epoch + 1))
+                await session.commit()
+            assert (await other.get("/api/users/me-auth", headers=spare_headers)).status_code == 200
+            await remote.reconcile()
+            assert remote.token_epoch(user_id) == 1
+            assert (await other.get("/api/users/me-auth", headers=spare_headers)).status_code == 401
+        # Epochs never go back
+        remote.apply(json.dumps({"user_id": user_id, "token_epoch": 0}))
+        assert remote.token_epoch(user_id) == 1
+        await first.state.redis.delete(revocation_key(jti))
+
+
+async def test_logout_all_revokes_every_token_of_the_user() -> None:
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            email = f"epoch-{uuid4().hex[:8]}@example.com"
+            assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+            verify = {"email": email, "code": email.split("@")[0]}
+            first = (await client.post("/api/auth/verify", json=verify)).json()
+            second = (await client.post("/api/auth/verify", json=verify)).json()
+            claims = [jwt.decode(t["access_token"], options={"verify_signature": False}) for t in (first, second)]
+            assert claims[0]["jti"] != claims[1]["jti"] and claims[0]["token_epoch"] == 0
+
+            def headers(tokens: dict) -> dict:
+                return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+            # Logging out one session leaves the other alone, even if both were issued in the same second
+            assert (await client.post("/api/auth/logout", headers=headers(first))).status_code == 204
+            assert (await client.get("/api/users/me-auth", headers=headers(first))).status_code == 401
+            assert (await client.get("/api/users/me-auth", headers=headers(second))).status_code == 200
+
+            assert (await client.post("/api/auth/logout-all", headers=headers(second))).status_code == 204
+            assert (await client.get("/api/users/me-auth", headers=headers(second))).status_code == 401
+            refreshed = await client.post("/api/auth/refresh", json={"refresh_token": second["refresh_token"]})
+            assert refreshed.status_code == 401
+
+            # New sessions carry the new epoch
+            third = (await client.post("/api/auth/verify", json=verify)).json()
+            assert jwt.decode(third["access_token"], options={"verify_signature": False})["token_epoch"] == 1
+            assert (await client.get("/api/users/me-auth", headers=headers(third))).status_code == 200
+            refreshed = await client.post("/api/auth/refresh", json={"refresh_token": third["refresh_token"]})
+            assert refreshed.status_code == 200
+        redis = app.state.redis
+        try:
+            await redis.delete(*(revocation_key(c["jti"]) for c in claims))
+        except (RedisError, OSError):
+            pass
+
+
+def _rsa_jwk(
+    kid: str,
+) -> tuple[rsa.RSAPrivateKey, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    return private_key, {**public, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+async def test_google_login_verifies_against_cached_jwks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "google_client_id", "client-1")
+    monkeypatch.setattr(get_settings(), "jwks_min_refresh_seconds", 0.0)
+    old_key, old_jwk = _rsa_jwk("k1")
+    new_key, new_jwk = _rsa_jwk("k2")
+    served = [old_jwk]
+    requests: list[str] = []
+
+    def key_server(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        return httpx.Response(200, json={"keys": served})
+
+    def id_token(key: rsa.RSAPrivateKey, kid: str, email: str, aud: str = "client-1") -> str:
+        now = int(time.time())
+        claims = {"iss": "https://accounts.google.com", "aud": aud, "sub": email, "email": email, "iat": now, "exp": now + 600}
+        return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+    app = create_app()
+    app.state.identity = IdentityProviders(http=httpx.AsyncClient(transport=httpx.MockTransport(key_server)))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        email = f"google-{uuid4().hex[:8]}@example.com"
+        for _ in range(3):
+            resp = await client.post("/api/auth/login", json={"provider": "google", "id_token": id_token(old_key, "k1", email)})
+            assert resp.status_code == 200 and resp.json()["user"]["email"] == email
+        assert requests == [get_settings().google_jwks_url]
+
+        wrong_audience = id_token(old_key, "k1", email, aud="someone-else")
+        assert (await client.post("/api/auth/login", json={"provider": "google", "id_token": wrong_audience})).status_code == 401
+
+        # The provider rotated its keys: an unknown kid refetches the set once
+        served = [new_jwk]
+        rotated = id_token(new_key, "k2", email)
+        assert (await client.post("/api/auth/login", json={"provider": "google", "id_token": rotated})).status_code == 200
+        assert len(requests) == 2
+        forged = id_token(old_key, "k2", email)
+        assert (await client.post("/api/auth/login", json={"provider": "google", "id_token": forged})).status_code == 401
+    await app.state.identity.close()
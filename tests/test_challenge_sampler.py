@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timezone
+
+from app.repositories.challenge_catalog import CatalogChallenge
+from app.repositories.challenge_sampler import ChallengeSampler, filter_key
+from app.repositories.seen_challenge_repo import SeenBitmap
+
+
+def _challenge(
+    challenge_id: int,
+    category: str,
+    size: str = "small",
+    is_premium_only: bool = False,
+) -> CatalogChallenge:
+    now = datetime.now(timezone.utc)
+    return CatalogChallenge(
+        id=challenge_id,
+        title=f"challenge {challenge_id}",
+        short_description=None,
+        title_rus=None,
+        short_description_rus=None,
+        category=category,
+        tags=None,
+        size=size,
+        estimated_duration_min=None,
+        is_premium_only=is_premium_only,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def test_sampler_draws_distinct_ids_from_matching_pool() -> None:
+    items = [
+        _challenge(i, category="food" if i % 2 else "movement", is_premium_only=i % 5 == 0)
+        for i in range(1, 1001)
+    ]
+    sampler = ChallengeSampler(items=items)
+    key = filter_key(category="food", free_only=True)
+    ids = sampler.sample(key=key, k=20, rng=random.Random(1))
+    assert len(ids) == len(set(ids)) == 20
+    assert all(i % 2 == 1 and i % 5 != 0 for i in ids)
+    assert sampler.sample(key=filter_key(category="missing"), k=5) == []
+    assert len(sampler.sample(key=filter_key(size="small"), k=5000)) == 1000
+
+
+def test_weighted_sampler_prefers_heavier_items() -> None:
+    items = [_challenge(i, category="food") for i in range(1, 101)]
+    sampler = ChallengeSampler(items=items, weight_of=lambda c: 1000.0 if c.id <= 5 else 0.01)
+    rng = random.Random(7)
+    hits = sum(i <= 5 for _ in range(50) for i in sampler.sample(key=filter_key(), k=5, rng=rng))
+    assert hits > 200
+    assert sorted(sampler.sample(key=filter_key(), k=100, rng=rng)) == list(range(1, 101))
+
+
+def test_sampler_draws_unseen_ids_before_seen_ones() -> None:
+    items = [_challenge(i, category="food") for i in range(1, 51)]
+    sampler = ChallengeSampler(items=items)
+    bits = bytearray(8)
+    for i in [0, *range(1, 46)]:
+        bits[i >> 3] |= 0x80 >> (i & 7)
+    seen = SeenBitmap(bytes(bits))
+    assert 45 in seen and 46 not in seen and 10**6 not in seen
+    ids = sampler.sample(key=filter_key(), k=8, rng=random.Random(3), exclude=seen)
+    assert sorted(ids[:5]) == [46, 47, 48, 49, 50]
+    assert len(set(ids)) == 8 and all(i <= 45 for i in ids[5:])
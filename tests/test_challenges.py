@@ -1,6 +1,12 @@
 import httpx
+from uuid import uuid4
+from sqlalchemy.dialects.postgresql import insert
 from app.tasks.seed_challenges import seed as seed_challenges
 from app.main import create_app
+from app.models.challenge import Challenge
+from app.schemas.challenge import ChallengeRead
+from app.repositories.challenge_catalog import bump_catalog_version, get_challenge_catalog_cache
+from app.repositories.challenge_tag_repo import ChallengeTagRepository
 
 
 async def test_challenges_list_and_get() -> None:
@@ -14,3 +20,220 @@ async def test_challenges_list_and_get() -> None:
         assert isinstance(items, list)
 
 
+
+
+async def test_catalog_reloads_after_version_bump() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_challenges()
+        first = (await client.get("/api/challenges/")).json()[0]
+        resp = await client.get(f"/api/challenges/{first['id']}")
+        assert resp.status_code == 200
+        assert resp.json()["title"] == first["title"]
+
+        title = f"catalog-{uuid4().hex[:8]}"
+        async with app.state.db_sessionmaker() as session:
+            await session.execute(insert(Challenge).values(title=title, size="small"))
+            await bump_catalog_version(session=session)
+            await session.commit()
+        found = (await client.get("/api/challenges/", params={"q": title})).json()
+        assert [item["title"] for item in found] == [title]
+
+
+async def test_search_ranks_prefix_matches_in_both_languages() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        marker = uuid4().hex[:8]
+        async with app.state.db_sessionmaker() as session:
+            await session.execute(
+                insert(Challenge).values(
+                    [
+                        {
+                            "title": f"Evening walk {marker}",
+                            "title_rus": f"Вечерняя прогулка {marker}",
+                            "short_description": None,
+                            "size": "small",
+                        },
+                        {
+                            "title": f"Cook dinner {marker}",
+                            "title_rus": None,
+                            "short_description": "Take a walk to the market first",
+                            "size": "small",
+                        },
+                    ]
+                )
+            )
+            await bump_catalog_version(session=session)
+            await session.commit()
+        ru = (await client.get("/api/challenges/", params={"q": f"прогул {marker}"})).json()
+        assert [item["title"] for item in ru] == [f"Evening walk {marker}"]
+        assert ru[0]["title_rus"] == f"Вечерняя прогулка {marker}"
+        en = (await client.get("/api/challenges/", params={"q": f"wal {marker}"})).json()
+        assert [item["title"] for item in en] == [f"Evening walk {marker}", f"Cook dinner {marker}"]
+
+
+async def test_cursor_pagination_matches_offset_pages() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_challenges()
+        expected = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 9})).json()]
+        seen: list[int] = []
+        params = {"limit": 3}
+        for _ in range(3):
+            resp = await client.get("/api/challenges/", params=params)
+            assert resp.status_code == 200
+            seen += [item["id"] for item in resp.json()]
+            params = {"limit": 3, "cursor": resp.headers["X-Next-Cursor"]}
+        assert seen == expected
+        bad = await client.get("/api/challenges/", params={"cursor": "not-a-cursor"})
+        assert bad.status_code == 400
+
+
+async def test_catalog_etag_answers_not_modified() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_challenges()
+        first = await client.get("/api/challenges/", params={"limit": 5})
+        etag = first.headers["ETag"]
+        again = await client.get("/api/challenges/", params={"limit": 5}, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["ETag"] == etag
+        other = await client.get("/api/challenges/", params={"limit": 6}, headers={"If-None-Match": etag})
+        assert other.status_code == 200
+
+        async with app.state.db_sessionmaker() as session:
+            await bump_catalog_version(session=session)
+            await session.commit()
+        stale = await client.get("/api/challenges/", params={"limit": 5}, headers={"If-None-Match": etag})
+        assert stale.status_code == 200
+        assert stale.headers["ETag"] != etag
+
+
+async def test_batch_keeps_order_and_reports_missing() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_challenges()
+        ids = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 3})).json()]
+        wanted = [ids[2], 10**12, ids[0]]
+        resp = await client.get("/api/challenges/batch", params={"ids": ",".join(map(str, wanted))})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert [item["id"] for item in body["items"]] == [ids[2], ids[0]]
+        assert body["missing"] == [10**12]
+        posted = await client.post("/api/challenges/batch", json={"ids": wanted})
+        assert posted.json() == body
+
+
+async def test_tag_filters_match_all_or_any() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        marker = uuid4().hex[:8]
+        both, only_a = f"both-{marker}", f"only-a-{marker}"
+        async with app.state.db_sessionmaker() as session:
+            await session.execute(
+                insert(Challenge).values(
+                    [
+                        {"title": both, "tags": f"a{marker},b{marker}", "size": "small"},
+                        {"title": only_a, "tags": f"a{marker}", "size": "small"},
+                    ]
+                )
+            )
+            await ChallengeTagRepository(session).sync_from_challenges()
+            await bump_catalog_version(session=session)
+            await session.commit()
+
+        tags = f"A{marker},b{marker}"
+        matched_all = (await client.get("/api/challenges/", params={"tags": tags})).json()
+        assert [item["title"] for item in matched_all] == [both]
+        matched_any = (await client.get("/api/challenges/", params={"tags": tags, "tags_mode": "any"})).json()
+        assert sorted(item["title"] for item in matched_any) == sorted([both, only_a])
+        drawn = (await client.get("/api/challenges/random", params={"tags": f"b{marker}", "limit": 5})).json()
+        assert [item["title"] for item in drawn] == [both]
+
+
+async def test_list_is_served_from_cached_payloads() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_challenges()
+        resp = await client.get("/api/challenges/", params={"limit": 3})
+        assert resp.headers["content-type"] == "application/json"
+        items = resp.json()
+        for item in items:
+            assert ChallengeRead.model_validate(item).model_dump(mode="json") == item
+
+        async with app.state.db_sessionmaker() as session:
+            catalog = await get_challenge_catalog_cache().get(session=session)
+        assert all(item["id"] in catalog.payloads for item in items)
+        single = await client.get(f"/api/challenges/{items[0]['id']}")
+        assert single.content == catalog.payloads[items[0]["id"]]
+
+
+async def test_random_exclude_seen_puts_unseen_cards_first() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"seen-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        marker = uuid4().hex[:8]
+        async with app.state.db_sessionmaker() as session:
+            await session.execute(
+                insert(Challenge).values(
+                    [{"title": f"deck-{marker}-{i}", "tags": f"deck{marker}", "size": "small"} for i in range(3)]
+                )
+            )
+            await ChallengeTagRepository(session).sync_from_challenges()
+            await bump_catalog_version(session=session)
+            await session.commit()
+        params = {"tags": f"deck{marker}", "limit": 1, "exclude_seen": "true"}
+        assert (await client.get("/api/challenges/random", params=params)).status_code == 401
+        # A stale token does not lock anonymous callers out of the public listing
+        bad = {"Authorization": "Bearer not-a-token"}
+        assert (await client.get("/api/challenges/random", params=params, headers=bad)).status_code == 401
+        public = {"tags": f"deck{marker}", "limit": 1}
+        assert (await client.get("/api/challenges/random", params=public, headers=bad)).status_code == 200
+
+        deck = (await client.get("/api/challenges/", params={"tags": f"deck{marker}"})).json()
+        await client.post("/api/activity/view", json={"challenge_id": deck[0]["id"]}, headers=headers)
+        await client.post("/api/activity/swipe", json={"challenge_id": deck[1]["id"], "direction": "left"}, headers=headers)
+        for _ in range(5):
+            drawn = (await client.get("/api/challenges/random", params=params, headers=headers)).json()
+            assert [item["id"] for item in drawn] == [deck[2]["id"]]
+        full = (await client.get("/api/challenges/random", params={**params, "limit": 3}, headers=headers)).json()
+        assert full[0]["id"] == deck[2]["id"] and len(full) == 3
+
+
+async def test_daily_deck_is_stable_across_app_instances() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"daily-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        assert (await client.get("/api/challenges/daily")).status_code == 401
+        first = await client.get("/api/challenges/daily", params={"limit": 4}, headers=headers)
+        assert first.status_code == 200
+        assert len(first.json()) == 4
+        again = await client.get("/api/challenges/daily", params={"limit": 4}, headers=headers)
+        assert again.json() == first.json()
+        cached = await client.get(
+            "/api/challenges/daily",
+            params={"limit": 4},
+            headers={**headers, "If-None-Match": first.headers["ETag"]},
+        )
+        assert cached.status_code == 304
+
+    other = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=other, base_url="http://test") as client:
+        resp = await client.get("/api/challenges/daily", params={"limit": 4}, headers=headers)
+        assert resp.json() == first.json()
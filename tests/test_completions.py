@@ -1,5 +1,9 @@
+import asyncio
 import httpx
+import pytest
 from uuid import uuid4
+from redis.exceptions import RedisError
+from app.core.redis import get_async_redis
 from app.main import create_app
 from app.tasks.seed_challenges import seed as seed_challenges
 
@@ -27,3 +31,35 @@ async def test_challenge_completion_and_day_pass() -> None:
         assert body["day_passed"] is True
 
 
+
+
+async def test_auth_codes_take_the_daily_quota_once() -> None:
+    try:
+        await get_async_redis().ping()
+    except (RedisError, OSError):
+        pytest.skip("atomic quota checks need Redis")
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"quota-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 429
+
+
+async def test_concurrent_completions_are_limited_in_one_statement() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"once-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        cid = (await client.get("/api/challenges/")).json()[0]["id"]
+        assert (await client.post("/api/challenges/999999999/complete", headers=headers)).status_code == 404
+        responses = await asyncio.gather(
+            *[client.post(f"/api/challenges/{cid}/complete", headers=headers) for _ in range(6)]
+        )
+        assert sorted(r.status_code for r in responses) == [201] + [429] * 5
+        stats = (await client.get("/api/profile/stats", params={"compact": "true"}, headers=headers)).json()
+        assert (stats["streak"], stats["total_completed_all_time"]) == (1, 1)
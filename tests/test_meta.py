@@ -0,0 +1,17 @@
+import httpx
+from app.main import create_app
+from app.tasks.seed_meta import seed as seed_meta
+
+
+async def test_meta_filters_etag() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await seed_meta()
+        resp = await client.get("/api/meta/filters")
+        assert resp.status_code == 200
+        assert "small" in resp.json()["sizes"]
+        assert resp.headers["Cache-Control"]
+        cached = await client.get("/api/meta/filters", headers={"If-None-Match": resp.headers["ETag"]})
+        assert cached.status_code == 304
+        assert cached.content == b""
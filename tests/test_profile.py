@@ -0,0 +1,147 @@
+import httpx
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import delete, select
+from app.main import create_app
+from app.models.user import User
+from app.models.user_daily_stats import UserDailyStats
+from app.repositories.user_repo import UserRepository
+from app.tasks.backfill_daily_stats import backfill
+from app.tasks.seed_challenges import seed as seed_challenges
+
+
+async def test_daily_rollup_tracks_writes_and_backfill_rebuilds_it() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"rollup-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        first, second = [item["id"] for item in (await client.get("/api/challenges/", params={"limit": 2})).json()]
+
+        assert (await client.post(f"/api/challenges/{first}/complete", headers=headers)).status_code == 201
+        assert (await client.post("/api/replacements/", json={"from_item": "coffee", "to_item": "water"}, headers=headers)).status_code == 201
+        events = [
+            {"type": "swipe", "challenge_id": first, "direction": "left"},
+            {"type": "swipe", "challenge_id": second, "direction": "right"},
+            {"type": "view", "challenge_id": first},
+            {"type": "view", "challenge_id": first},
+            {"type": "select", "challenge_id": second},
+        ]
+        assert (await client.post("/api/activity/batch", json={"events": events}, headers=headers)).status_code == 200
+        await client.post("/api/activity/view", json={"challenge_id": first}, headers=headers)
+        await client.post("/api/activity/swipe", json={"challenge_id": first, "direction": "right"}, headers=headers)
+
+        day = (await client.get("/api/profile/day", headers=headers)).json()
+        assert day == {"challenges_today": 1, "replacements_today": 1, "day_passed": True}
+        stats = (await client.get("/api/profile/stats", headers=headers)).json()
+        assert (stats["streak"], stats["longest_streak"], stats["total_completed_all_time"]) == (1, 1, 1)
+        assert (await client.get("/api/activity/swipes/today", headers=headers)).json() == {"swipes_today": 3}
+
+        today = datetime.now(timezone.utc).date()
+        columns = ("completions", "replacements", "swipes_left", "swipes_right", "views", "selects")
+        async with app.state.db_sessionmaker() as session:
+            user_id = await session.scalar(select(User.id).where(User.email == email))
+            row = await session.get(UserDailyStats, (user_id, today))
+            assert tuple(getattr(row, c) for c in columns) == (1, 1, 1, 2, 1, 1)
+
+            await session.execute(delete(UserDailyStats).where(UserDailyStats.user_id == user_id))
+            await session.commit()
+            assert await backfill(session=session, date_from=today, date_to=today) >= 1
+            session.expire_all()
+            row = await session.get(UserDailyStats, (user_id, today))
+            assert tuple(getattr(row, c) for c in columns) == (1, 1, 1, 2, 1, 1)
+
+
+async def test_stats_cover_a_year_with_a_run_length_heatmap() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"heatmap-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        today = datetime.now(timezone.utc).date()
+        async with app.state.db_sessionmaker() as session:
+            user_id = await session.scalar(select(User.id).where(User.email == email))
+            for back, completions in ((0, 1), (1, 2), (2, 1), (4, 1), (300, 3)):
+                session.add(UserDailyStats(user_id=user_id, day=today - timedelta(days=back), completions=completions))
+            await session.flush()
+            assert await UserRepository(session=session).recompute_progress(user_id=user_id) == 1
+            await session.commit()
+
+        params = {"date_from": (today - timedelta(days=364)).isoformat(), "date_to": today.isoformat()}
+        body = (await client.get("/api/profile/stats", params=params, headers=headers)).json()
+        assert (body["streak"], body["longest_streak"]) == (3, 3)
+        assert body["total_completed"] == body["total_completed_all_time"] == 8
+        assert len(body["daily_stats"]) == 365
+        assert body["heatmap"] == [[0, 64], [3, 1], [0, 295], [1, 1], [0, 1], [1, 1], [2, 1], [1, 1]]
+        assert sum(days for _, days in body["heatmap"]) == 365
+
+        compact = (await client.get("/api/profile/stats", params={**params, "compact": "true"}, headers=headers)).json()
+        assert "daily_stats" not in compact and compact["heatmap"] == body["heatmap"]
+
+        default = (await client.get("/api/profile/stats", headers=headers)).json()
+        assert len(default["daily_stats"]) == 31 and default["total_completed"] == 5
+        assert default["streak"] == 3 and default["total_completed_all_time"] == 8
+
+        backwards = {"date_from": params["date_to"], "date_to": params["date_from"]}
+        assert (await client.get("/api/profile/stats", params=backwards, headers=headers)).status_code == 400
+        too_long = {"date_from": "2000-01-01", "date_to": params["date_to"]}
+        assert (await client.get("/api/profile/stats", params=too_long, headers=headers)).status_code == 400
+
+
+async def test_completion_extends_a_stored_streak_of_any_length() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"streak-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await seed_challenges()
+        challenge_id = (await client.get("/api/challenges/", params={"limit": 1})).json()[0]["id"]
+        today = datetime.now(timezone.utc).date()
+        async with app.state.db_sessionmaker() as session:
+            user = (await session.execute(select(User).where(User.email == email))).scalar_one()
+            user.current_streak, user.longest_streak, user.total_completed = 400, 450, 900
+            user.last_completion_day = today - timedelta(days=1)
+            await session.commit()
+
+        assert (await client.post(f"/api/challenges/{challenge_id}/complete", headers=headers)).status_code == 201
+        stats = (await client.get("/api/profile/stats", params={"compact": "true"}, headers=headers)).json()
+        assert (stats["streak"], stats["longest_streak"], stats["total_completed_all_time"]) == (401, 450, 901)
+
+        async with app.state.db_sessionmaker() as session:
+            user = (await session.execute(select(User).where(User.email == email))).scalar_one()
+            assert user.last_completion_day == today
+            assert user.streak_on(today + timedelta(days=1)) == 401
+            assert user.streak_on(today + timedelta(days=2)) == 0
+
+
+async def test_stats_read_the_cached_user_until_it_changes() -> None:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = f"cached-{uuid4().hex[:8]}@example.com"
+        assert (await client.post("/api/auth/request-code", json={"email": email})).status_code == 204
+        token = (await client.post("/api/auth/verify", json={"email": email, "code": email.split("@")[0]})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await client.get("/api/users/me-auth", headers=headers)).json()["email"] == email
+        await seed_challenges()
+        challenge_id = (await client.get("/api/challenges/", params={"limit": 1})).json()[0]["id"]
+        params = {"compact": "true"}
+        assert (await client.get("/api/profile/stats", params=params, headers=headers)).json()["total_completed_all_time"] == 0
+
+        # Writes made behind the cache's back show up only once the entry expires
+        async with app.state.db_sessionmaker() as session:
+            user = (await session.execute(select(User).where(User.email == email))).scalar_one()
+            user.total_completed = 50
+            await session.commit()
+        assert (await client.get("/api/profile/stats", params=params, headers=headers)).json()["total_completed_all_time"] == 0
+
+        # A completion invalidates it right away
+        assert (await client.post(f"/api/challenges/{challenge_id}/complete", headers=headers)).status_code == 201
+        assert (await client.get("/api/profile/stats", params=params, headers=headers)).json()["total_completed_all_time"] == 51